@@ -0,0 +1,207 @@
+"""
+Plays many copies of a level of the Key Cave Adventure Game at once with NumPy.
+
+A BatchEngine keeps the state of N games in arrays: the position of each
+player, the moves left, the keys held, whether the game is won and which
+items were picked up. A single call to step applies one action to every
+game with array operations only, exactly as GameEngine.step applies it to
+a GameLogic, so thousands of games cost little more than one.
+
+The level itself is shared: walls are a single walkable mask, and the keys,
+doors and move increases are numbered slots, of which each game only
+records the ones it has used up.
+
+This module needs NumPy, unlike the rest of the model.
+"""
+
+import numpy as np
+
+from game_logic import KEY, DOOR, MOVE_INCREASE, DIRECTIONS
+from solver import walkable_cells
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+# the actions, in the order of DIRECTIONS, and one which does nothing
+ACTIONS = list(DIRECTIONS)
+NOOP = len(ACTIONS)
+
+# the kinds of item slots
+KEY_SLOT = 0
+DOOR_SLOT = 1
+MOVE_INCREASE_SLOT = 2
+
+# row and column change of each action, NOOP included
+_ROW_CHANGES = np.array([DIRECTIONS[action][0] for action in ACTIONS] + [0], dtype=np.int32)
+_COL_CHANGES = np.array([DIRECTIONS[action][1] for action in ACTIONS] + [0], dtype=np.int32)
+
+class BatchEngine:
+    """Applies one action to each of N copies of a game per step."""
+    def __init__(self, game, count):
+        """
+        Constructor of BatchEngine. Every copy starts in the current state
+        of game, which is not changed.
+
+        Parameters:
+            game (GameLogic): The game to copy
+            count (int): The number of copies
+        """
+        self._count = count
+        self._size = size = game.get_dungeon_size()
+        self._walkable = np.frombuffer(bytes(walkable_cells(game)), dtype=np.uint8) \
+            .reshape(size, size).astype(bool)
+
+        # item slot of each cell, -1 where there is none
+        self._slots = np.full((size, size), -1, dtype=np.int32)
+        kinds = []
+        bonuses = []
+        index = game.get_index()
+        for entity_id, kind in ((KEY, KEY_SLOT), (DOOR, DOOR_SLOT),
+                                (MOVE_INCREASE, MOVE_INCREASE_SLOT)):
+            for row, col in sorted(index.get_present(entity_id)):
+                if 0 <= row < size and 0 <= col < size:
+                    self._slots[row, col] = len(kinds)
+                    kinds.append(kind)
+                    entity = game.get_entity((row, col))
+                    bonuses.append(entity.get_moves() if kind == MOVE_INCREASE_SLOT else 0)
+        self._kinds = np.array(kinds, dtype=np.int8)
+        self._bonuses = np.array(bonuses, dtype=np.int64)
+
+        player = game.get_player()
+        self._start = {
+            "rows": player.get_position()[0],
+            "cols": player.get_position()[1],
+            "moves": player.moves_remaining(),
+            "keys": sum(1 for item in player.get_inventory() if item.get_id() == KEY),
+            "won": game.won(),
+            }
+        self._rows = np.empty(count, dtype=np.int32)
+        self._cols = np.empty(count, dtype=np.int32)
+        self._moves = np.empty(count, dtype=np.int64)
+        self._keys = np.empty(count, dtype=np.int32)
+        self._won = np.empty(count, dtype=bool)
+        self._used = np.empty((count, len(kinds)), dtype=bool)
+        self.reset()
+
+    def reset(self, games=None):
+        """
+        Puts games back in the starting state.
+
+        Parameters:
+            games (ndarray): A boolean mask or the indices of the games to
+                reset, by default all of them
+        """
+        if games is None:
+            games = slice(None)
+        self._rows[games] = self._start["rows"]
+        self._cols[games] = self._start["cols"]
+        self._moves[games] = self._start["moves"]
+        self._keys[games] = self._start["keys"]
+        self._won[games] = self._start["won"]
+        self._used[games] = False
+
+    def get_count(self):
+        """Returns the number of games."""
+        return self._count
+
+    def get_size(self):
+        """Returns the number of rows and columns of the level."""
+        return self._size
+
+    def get_positions(self):
+        """Returns the (row, col) of each player as an N x 2 array."""
+        return np.stack((self._rows, self._cols), axis=1)
+
+    def get_rows(self):
+        """Returns the row of each player, which must not be modified."""
+        return self._rows
+
+    def get_cols(self):
+        """Returns the column of each player, which must not be modified."""
+        return self._cols
+
+    def get_moves(self):
+        """Returns the moves left in each game, which must not be modified."""
+        return self._moves
+
+    def get_keys(self):
+        """Returns the number of keys held in each game, which must not be modified."""
+        return self._keys
+
+    def get_used(self):
+        """Returns an N x slots array of which items each game has used up."""
+        return self._used
+
+    def get_walkable(self):
+        """Returns the size x size mask of the cells which may be entered."""
+        return self._walkable
+
+    def get_slots(self):
+        """Returns the size x size item slot of each cell, -1 where there is none."""
+        return self._slots
+
+    def get_slot_kinds(self):
+        """Returns the kind of each item slot: KEY_SLOT, DOOR_SLOT or MOVE_INCREASE_SLOT."""
+        return self._kinds
+
+    def won(self):
+        """Returns which games are won."""
+        return self._won.copy()
+
+    def lost(self):
+        """Returns which games are lost, that is out of moves and not won."""
+        return (self._moves <= 0) & ~self._won
+
+    def done(self):
+        """Returns which games are over, won or lost."""
+        return self._won | (self._moves <= 0)
+
+    def step(self, actions):
+        """
+        Applies an action to every game, exactly as GameEngine.step applies
+        a direction: each action but NOOP costs a move, even into a wall,
+        and games which are over still move.
+
+        Parameters:
+            actions (ndarray): The index in ACTIONS of the direction for each
+                game, or NOOP
+
+        Returns:
+            (ndarray): Which players changed position
+        """
+        actions = np.asarray(actions)
+        valid = actions < NOOP
+        self._moves -= valid
+
+        rows = self._rows + _ROW_CHANGES[actions]
+        cols = self._cols + _COL_CHANGES[actions]
+        size = self._size
+        inside = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+        np.clip(rows, 0, size - 1, out=rows)
+        np.clip(cols, 0, size - 1, out=cols)
+        moved = valid & inside & self._walkable[rows, cols]
+        np.copyto(self._rows, rows, where=moved)
+        np.copyto(self._cols, cols, where=moved)
+
+        if not len(self._kinds):
+            return moved
+        games = np.flatnonzero(moved)
+        slots = self._slots[self._rows[games], self._cols[games]]
+        hit = slots >= 0
+        games = games[hit]
+        slots = slots[hit]
+        fresh = ~self._used[games, slots]
+        games = games[fresh]
+        slots = slots[fresh]
+        kinds = self._kinds[slots]
+
+        keys = kinds == KEY_SLOT
+        self._keys[games[keys]] += 1
+        bonuses = kinds == MOVE_INCREASE_SLOT
+        self._moves[games[bonuses]] += self._bonuses[slots[bonuses]]
+        # a door only opens, and disappears, for a player with a key
+        doors = (kinds == DOOR_SLOT) & (self._keys[games] > 0)
+        self._won[games[doors]] = True
+        taken = keys | bonuses | doors
+        self._used[games[taken], slots[taken]] = True
+        return moved
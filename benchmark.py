@@ -0,0 +1,383 @@
+"""
+Benchmarks the Key Cave Adventure Game on generated levels of many sizes.
+
+Each benchmark is run on a level from generator.py of every size given, and
+the best of a few repeats is kept. Peak memory is measured with tracemalloc
+in a separate run, so that tracing does not slow down the timings; the cold
+start benchmarks run in a new interpreter, whose memory is not traced. The
+results are written as JSON together with the exponent of how each
+benchmark scales with the number of cells, and can be compared with an
+earlier run to catch regressions.
+
+The drawing benchmarks need a display. Without one they are skipped, so on
+a headless machine run them under Xvfb:
+
+Usage:
+    xvfb-run python benchmark.py --sizes 5 50 500 2000 -o results.json
+    python benchmark.py --compare results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from game_logic import KEY, DOOR, WALL, MOVE_INCREASE, DIRECTIONS, load_game, GameLogic
+from generator import LevelGenerator
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+SIZES = [5, 20, 100, 500, 1000, 2000]
+REPEAT = 3
+SEED = 0
+# moves made by the stepping, undo and drawing benchmarks
+MOVES = 20000
+DRAW_MOVES = 200
+# a benchmark which gets this much slower than in the compared run is a regression
+THRESHOLD = 0.25
+
+class _Skipped(Exception):
+    """Raised by a benchmark which cannot run here."""
+
+def _walk(size, moves, seed):
+    """Returns a seeded random sequence of directions."""
+    directions = list(DIRECTIONS)
+    generator = random.Random(seed + size)
+    return [generator.choice(directions) for _ in range(moves)]
+
+def bench_load_game(level, size):
+    """Reads the level file into lines."""
+    load_game(level)
+    return 1
+
+def bench_init(level, size):
+    """Builds a GameLogic with the entities in a dict."""
+    GameLogic(level, moves=0)
+    return 1
+
+def bench_init_compact(level, size):
+    """Builds a GameLogic with the entities in a CompactGrid."""
+    GameLogic(level, compact=True, moves=0)
+    return 1
+
+def _stepping(level, size, compact):
+    """Makes MOVES random moves with collision_check and move_player."""
+    game = GameLogic(level, compact=compact, moves=MOVES)
+    walk = _walk(size, MOVES, SEED)
+    collision_check = game.collision_check
+    move_player = game.move_player
+    start = time.perf_counter()
+    for direction in walk:
+        if not collision_check(direction):
+            move_player(direction)
+    return MOVES, time.perf_counter() - start
+
+def bench_step(level, size):
+    """Steps a GameLogic with the entities in a dict."""
+    return _stepping(level, size, False)
+
+def bench_step_compact(level, size):
+    """Steps a GameLogic with the entities in a CompactGrid."""
+    return _stepping(level, size, True)
+
+def bench_get_positions(level, size):
+    """Finds the positions of every kind of entity."""
+    game = GameLogic(level, compact=True, moves=0)
+    start = time.perf_counter()
+    for entity_id in (KEY, DOOR, MOVE_INCREASE, WALL):
+        game.get_positions(entity_id)
+    return 4, time.perf_counter() - start
+
+def bench_undo(level, size):
+    """Makes MOVES journaled moves and undoes all of them, as use_life does."""
+    game = GameLogic(level, compact=True, moves=MOVES)
+    game.start_journal()
+    for direction in _walk(size, MOVES, SEED):
+        game.play_move(direction)
+    undo = game.undo
+    start = time.perf_counter()
+    while undo() is not None:
+        pass
+    return MOVES, time.perf_counter() - start
+
+def _drawing(level, size, view):
+    """Draws a level with a view of views.py, then redraws it after each move."""
+    try:
+        import tkinter as tk
+        import views
+    except ImportError as error:
+        raise _Skipped(f"the views cannot be imported: {error}")
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        raise _Skipped(f"no display: {error}")
+    try:
+        root.withdraw()
+        game = GameLogic(level, compact=True, moves=DRAW_MOVES)
+        display = getattr(views, view)(root, size, width=600, view_size=views.VIEW_SIZE)
+        information = game.get_game_information()
+        player = game.get_player()
+        start = time.perf_counter()
+        display.draw_grid(information, player.get_position())
+        root.update_idletasks()
+        for direction in _walk(size, DRAW_MOVES, SEED):
+            game.play_move(direction)
+            display.draw_grid(information, player.get_position())
+        root.update_idletasks()
+        return DRAW_MOVES + 1, time.perf_counter() - start
+    finally:
+        root.destroy()
+
+def bench_draw(level, size):
+    """Draws with a DungeonMap."""
+    return _drawing(level, size, "DungeonMap")
+
+def bench_draw_advanced(level, size):
+    """Draws with an AdvancedDungeonMap."""
+    return _drawing(level, size, "AdvancedDungeonMap")
+
+# exit status of a cold start script which found no display
+_NO_DISPLAY = 3
+
+# cold start scripts, run in a new interpreter with the level as argument
+_START_SCRIPT = """
+import sys
+from engine import GameEngine
+from game_logic import GameLogic
+GameEngine(GameLogic(sys.argv[1], moves=0))
+"""
+_START_GUI_SCRIPT = """
+import sys
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError:
+    sys.exit(%d)
+from key_adventure import GAME_LEVELS, GameApp, TASK_TWO
+# the game only opens levels which have a move budget
+GAME_LEVELS[sys.argv[1]] = 0
+GameApp(root, task=TASK_TWO, dungeon_name=sys.argv[1], autosave_interval=None)
+root.update()
+root.destroy()
+""" % _NO_DISPLAY
+
+def _cold_start(level, script):
+    """Runs a script in a new interpreter from the directory of the game."""
+    process = subprocess.run([sys.executable, "-c", script, os.path.abspath(level)],
+                             cwd=os.path.dirname(os.path.abspath(__file__)),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if process.returncode == _NO_DISPLAY:
+        raise _Skipped("no display")
+    if process.returncode:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    return 1
+
+def bench_start(level, size):
+    """Starts a new interpreter which loads the level headless, as the tools do."""
+    return _cold_start(level, _START_SCRIPT)
+
+def bench_start_gui(level, size):
+    """Starts a new interpreter which opens the game window on the level."""
+    return _cold_start(level, _START_GUI_SCRIPT)
+
+BENCHMARKS = {
+    "load_game": bench_load_game,
+    "init": bench_init,
+    "init_compact": bench_init_compact,
+    "step": bench_step,
+    "step_compact": bench_step_compact,
+    "get_positions": bench_get_positions,
+    "undo": bench_undo,
+    "draw": bench_draw,
+    "draw_advanced": bench_draw_advanced,
+    "start": bench_start,
+    "start_gui": bench_start_gui,
+    }
+
+def _time(benchmark, level, size):
+    """
+    Runs a benchmark once. A benchmark returns the number of operations it
+    made, and the seconds they took if only part of it is to be timed.
+    """
+    start = time.perf_counter()
+    result = benchmark(level, size)
+    seconds = time.perf_counter() - start
+    if isinstance(result, tuple):
+        return result
+    return result, seconds
+
+def run_benchmark(name, level, size, repeat=REPEAT):
+    """
+    Runs a benchmark on a level, keeping the best of several repeats.
+
+    Parameters:
+        name (str): The name of the benchmark in BENCHMARKS
+        level (str): The level file
+        size (int): The number of rows and columns of the level
+        repeat (int): The number of times to run it
+
+    Returns:
+        (dict): The result, with the seconds per run, the operations per
+            second and the peak memory in bytes, or why it was skipped
+    """
+    benchmark = BENCHMARKS[name]
+    result = {"benchmark": name, "size": size}
+    try:
+        runs = [_time(benchmark, level, size) for _ in range(repeat)]
+        tracemalloc.start()
+        try:
+            benchmark(level, size)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except _Skipped as reason:
+        result["skipped"] = str(reason)
+        return result
+
+    operations, seconds = min(runs, key=lambda run: run[1])
+    result.update({
+        "seconds": seconds,
+        "operations": operations,
+        "operations_per_second": operations / seconds if seconds else None,
+        "peak_bytes": peak,
+        })
+    return result
+
+def scaling(results):
+    """
+    Fits how the time of each benchmark grows with the number of cells.
+
+    Parameters:
+        results (list<dict>): The results of run_benchmark
+
+    Returns:
+        (dict<str, float>): For each benchmark run on at least two sizes,
+            the exponent k of a least squares fit of seconds ~ cells ** k
+    """
+    points = {}
+    for result in results:
+        if result.get("seconds"):
+            points.setdefault(result["benchmark"], []).append(
+                (math.log(result["size"] ** 2), math.log(result["seconds"])))
+    exponents = {}
+    for name, xy in points.items():
+        if len(xy) < 2:
+            continue
+        mean_x = sum(x for x, _ in xy) / len(xy)
+        mean_y = sum(y for _, y in xy) / len(xy)
+        variance = sum((x - mean_x) ** 2 for x, _ in xy)
+        if variance:
+            covariance = sum((x - mean_x) * (y - mean_y) for x, y in xy)
+            exponents[name] = round(covariance / variance, 3)
+    return exponents
+
+def run_suite(sizes=SIZES, names=None, repeat=REPEAT, directory=None, log=None):
+    """
+    Runs benchmarks on a generated level of each size.
+
+    Parameters:
+        sizes (list<int>): The numbers of rows and columns of the levels
+        names (list<str>): The benchmarks to run, by default all of them
+        repeat (int): The number of times to run each benchmark
+        directory (str): Where to write the levels, by default a
+            temporary directory which is removed afterwards
+        log (file): A file to report progress to, if any
+
+    Returns:
+        (dict): The report, with the machine it ran on, every result and
+            the scaling of each benchmark
+    """
+    names = names or list(BENCHMARKS)
+    results = []
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = directory or temporary
+        for size in sizes:
+            level = os.path.join(directory, f"benchmark_{size}.txt")
+            LevelGenerator(size, SEED).write(level)
+            for name in names:
+                result = run_benchmark(name, level, size, repeat)
+                results.append(result)
+                if log is not None:
+                    detail = result.get("skipped") or f"{result['seconds']:.6f}s"
+                    print(f"{name} {size}x{size}: {detail}", file=log)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": SEED,
+        "repeat": repeat,
+        "results": results,
+        "scaling": scaling(results),
+        }
+
+def compare(report, baseline, threshold=THRESHOLD):
+    """
+    Finds the benchmarks which got slower than in an earlier report.
+
+    Parameters:
+        report (dict): The report of run_suite
+        baseline (dict): An earlier report
+        threshold (float): How much slower counts as a regression, 0.25
+            for 25%
+
+    Returns:
+        (list<tuple<str, int, float>>): The name, size and ratio of new to
+            old seconds of each regression
+    """
+    old = {(result["benchmark"], result["size"]): result["seconds"]
+           for result in baseline["results"] if result.get("seconds")}
+    regressions = []
+    for result in report["results"]:
+        before = old.get((result["benchmark"], result["size"]))
+        if before and result.get("seconds"):
+            ratio = result["seconds"] / before
+            if ratio > 1 + threshold:
+                regressions.append((result["benchmark"], result["size"], ratio))
+    return regressions
+
+def main(argv=None):
+    """
+    Runs the benchmarks given on the command line and writes the report.
+
+    Returns:
+        (int): 1 if a benchmark regressed against --compare, otherwise 0
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Key Cave Adventure Game.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="numbers of rows and columns of the levels")
+    parser.add_argument("-b", "--benchmark", action="append", choices=list(BENCHMARKS),
+                        help="benchmark to run (default: all of them)")
+    parser.add_argument("-r", "--repeat", type=int, default=REPEAT,
+                        help="runs of each benchmark, the best is kept")
+    parser.add_argument("-o", "--output", help="write the report to this file")
+    parser.add_argument("--compare", help="an earlier report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown which counts as a regression (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.benchmark, args.repeat, log=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        for name, size, ratio in regressions:
+            print(f"regression: {name} {size}x{size} is {ratio:.2f}x slower", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
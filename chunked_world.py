@@ -0,0 +1,282 @@
+"""
+Storage for very large levels which are read from a memory-mapped file in tiles.
+
+A LevelFile maps the level file into memory and finds where each row starts
+and where the player, keys, doors and move increases are, without ever
+decoding the whole level. A ChunkedGrid then parses square tiles of the
+level the first time a cell inside them is needed, keeping only a bounded
+number of them, least recently used first out. Changes made during the game,
+such as picked up items, are kept separately from the tiles so that they
+survive a tile being dropped and parsed again.
+"""
+
+import mmap
+import re
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from game_logic import WALL, SPACE, WALL_ENTITY, ENTITY_TYPES
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+TILE_SIZE = 64
+MAX_TILES = 256
+
+_NEWLINE = re.compile(b"\n")
+_NON_WALL_ENTITY = re.compile(f"[^{re.escape(WALL)}{re.escape(SPACE)}\n]".encode())
+_WALLS = re.compile(re.escape(WALL).encode())
+_ANY_ENTITY = re.compile(f"[^{re.escape(SPACE)}\n]".encode())
+_BLOCKED_CODES = bytes(1 if byte == ord(WALL) else 0 for byte in range(256))
+
+# Marks a position which has not been changed since the level was loaded
+_UNCHANGED = object()
+
+class LevelFile:
+    """A level file mapped into memory, with the start of each row indexed."""
+    def __init__(self, filename):
+        """
+        Constructor of LevelFile.
+
+        Parameters:
+            filename (str): The level file
+        """
+        self._file = open(filename, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            self._map = b""
+        starts = array("q", [0])
+        starts.extend(match.end() for match in _NEWLINE.finditer(self._map))
+        if starts[-1] == len(self._map):
+            starts.pop()
+        if not self._map:
+            starts = array("q")
+        self._starts = starts
+        self._entities = None
+
+    def get_rows(self):
+        """Returns the number of rows in the level."""
+        return len(self._starts)
+
+    def get_row(self, row, start=0, end=None):
+        """
+        Returns part of a row of the level.
+
+        Parameters:
+            row (int): The row
+            start (int): The first column
+            end (int): The column after the last one, by default the end of the row
+
+        Returns:
+            (bytes): The cells of the row from start to end, which may be
+                shorter than requested if the row is short
+        """
+        line_start = self._starts[row]
+        if row + 1 < len(self._starts):
+            line_end = self._starts[row + 1] - 1
+        else:
+            line_end = len(self._map)
+            if self._map[line_end - 1:line_end] == b"\n":
+                line_end -= 1
+        if end is None:
+            end = line_end - line_start
+        return self._map[line_start + start:min(line_start + end, line_end)]
+
+    def get_entities(self):
+        """
+        Finds every cell which is neither a wall nor empty, scanning the
+        file once and remembering the result.
+
+        Returns:
+            (list<tuple<str, tuple<int, int>>>): The character and (row, col)
+                position of each such cell, in reading order
+        """
+        if self._entities is None:
+            self._entities = entities = []
+            for row in range(len(self._starts)):
+                for match in _NON_WALL_ENTITY.finditer(self.get_row(row)):
+                    entities.append((match.group().decode("latin-1"), (row, match.start())))
+        return self._entities
+
+    def close(self):
+        """Releases the memory map and the file. Closing twice does nothing."""
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ChunkedGrid(MutableMapping):
+    """
+    A dictionary of (row, col) positions to entities for a LevelFile,
+    which parses the level in square tiles only when they are used.
+    """
+    def __init__(self, level, tile_size=TILE_SIZE, max_tiles=MAX_TILES):
+        """
+        Constructor of ChunkedGrid.
+
+        Parameters:
+            level (LevelFile): The level to read
+            tile_size (int): The number of rows and columns in each tile
+            max_tiles (int): The number of parsed tiles to keep
+        """
+        self._level = level
+        self._rows = level.get_rows()
+        self._tile_size = tile_size
+        self._max_tiles = max_tiles
+        # (tile row, tile col) -> (blocked bytearray, {index in tile: entity})
+        self._tiles = OrderedDict()
+        self._last_key = None
+        self._last_tile = None
+        # position -> entity placed, or None if removed, since the level was loaded
+        self._changes = {}
+        self._loads = 0
+
+    def get_resident_tiles(self):
+        """Returns the number of tiles currently parsed."""
+        return len(self._tiles)
+
+    def get_tile_loads(self):
+        """Returns the number of times a tile has been parsed."""
+        return self._loads
+
+    def _load_tile(self, tile_row, tile_col):
+        """Parses the tile at (tile_row, tile_col) from the level file."""
+        size = self._tile_size
+        blocked = bytearray(size * size)
+        entities = {}
+        start_col = tile_col * size
+        for row in range(tile_row * size, min((tile_row + 1) * size, self._rows)):
+            cells = self._level.get_row(row, start_col, start_col + size)
+            offset = (row % size) * size
+            blocked[offset:offset + len(cells)] = cells.translate(_BLOCKED_CODES)
+            for match in _NON_WALL_ENTITY.finditer(cells):
+                entity_type = ENTITY_TYPES.get(chr(match.group()[0]))
+                if entity_type is not None:
+                    entities[offset + match.start()] = entity_type()
+        self._loads += 1
+        return blocked, entities
+
+    def _tile(self, tile_row, tile_col):
+        """Returns the tile at (tile_row, tile_col), parsing it if needed."""
+        key = (tile_row, tile_col)
+        if key == self._last_key:
+            return self._last_tile
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._tiles[key] = self._load_tile(tile_row, tile_col)
+            if len(self._tiles) > self._max_tiles:
+                self._tiles.popitem(last=False)
+        else:
+            self._tiles.move_to_end(key)
+        self._last_key = key
+        self._last_tile = tile
+        return tile
+
+    def _in_level(self, row, col):
+        """Returns True if (row, col) may hold an entity."""
+        return 0 <= row < self._rows and col >= 0
+
+    def is_blocked(self, row, col):
+        """Returns True if the cell at (row, col), which must be in the level, cannot be entered."""
+        if self._changes:
+            entity = self._changes.get((row, col), _UNCHANGED)
+            if entity is not _UNCHANGED:
+                return entity is not None and not entity.can_collide()
+        size = self._tile_size
+        blocked, _ = self._tile(row // size, col // size)
+        return blocked[(row % size) * size + col % size] == 1
+
+    def blocked_row(self, row, length):
+        """
+        Returns which cells of a row cannot be entered, reading the file
+        directly rather than through the tiles.
+
+        Parameters:
+            row (int): The row
+            length (int): The number of cells to return
+
+        Returns:
+            (bytearray): 1 for each blocked cell and 0 otherwise
+        """
+        blocked = bytearray(length)
+        cells = self._level.get_row(row, 0, length).translate(_BLOCKED_CODES)
+        blocked[:len(cells)] = cells
+        for (change_row, col), entity in self._changes.items():
+            if change_row == row and col < length:
+                blocked[col] = 1 if entity is not None and not entity.can_collide() else 0
+        return blocked
+
+    def wall_positions(self):
+        """Returns the positions of the walls in reading order."""
+        positions = []
+        for row in range(self._rows):
+            for match in _WALLS.finditer(self._level.get_row(row)):
+                position = (row, match.start())
+                if self._changes.get(position, WALL_ENTITY) is WALL_ENTITY:
+                    positions.append(position)
+        return positions
+
+    def get(self, position, default=None):
+        """Returns the entity at position, or default if there is none."""
+        row, col = position
+        if not self._in_level(row, col):
+            return default
+        if self._changes:
+            entity = self._changes.get(position, _UNCHANGED)
+            if entity is not _UNCHANGED:
+                return default if entity is None else entity
+        size = self._tile_size
+        blocked, entities = self._tile(row // size, col // size)
+        index = (row % size) * size + col % size
+        entity = entities.get(index)
+        if entity is not None:
+            return entity
+        if blocked[index]:
+            return WALL_ENTITY
+        return default
+
+    def __getitem__(self, position):
+        entity = self.get(position)
+        if entity is None:
+            raise KeyError(position)
+        return entity
+
+    def __contains__(self, position):
+        return self.get(position) is not None
+
+    def __setitem__(self, position, entity):
+        if not self._in_level(*position):
+            raise KeyError(position)
+        self._changes[position] = entity
+
+    def __delitem__(self, position):
+        if position not in self:
+            raise KeyError(position)
+        self._changes[position] = None
+
+    def __iter__(self):
+        for row in range(self._rows):
+            for match in _ANY_ENTITY.finditer(self._level.get_row(row)):
+                position = (row, match.start())
+                if self.get(position) is not None:
+                    yield position
+        for position, entity in list(self._changes.items()):
+            if entity is not None and not self._in_file(position):
+                yield position
+
+    def _in_file(self, position):
+        """Returns True if the level file has an entity at position."""
+        row, col = position
+        cell = self._level.get_row(row, col, col + 1)
+        return cell != b"" and cell != SPACE.encode()
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,155 @@
+"""
+A headless engine which plays the Key Cave Adventure Game without any view.
+
+The engine only depends on the model in game_logic, so it can be used by
+tools and bots which never load tkinter or PIL.
+"""
+
+from game_logic import DIRECTIONS, GameLogic
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+RUNNING = "running"
+WON = "won"
+LOST = "lost"
+
+class GameEngine:
+    """Applies moves to a GameLogic and reports the state of the game."""
+    def __init__(self, game):
+        """
+        Constructor of GameEngine.
+
+        Parameters:
+            game (GameLogic): The game to advance
+        """
+        self._game = game
+        self._steps = 0
+
+    @classmethod
+    def from_file(cls, dungeon_name, compact=False, moves=None):
+        """
+        Creates an engine for a new game of the given level.
+
+        Parameters:
+            dungeon_name (str): The name of the file to load the level from
+            compact (bool): If True, the level is stored in a CompactGrid
+            moves (int): The moves the player starts with, by default the
+                budget of the level in GAME_LEVELS
+
+        Returns:
+            (GameEngine): An engine for the level
+        """
+        return cls(GameLogic(dungeon_name, compact, moves))
+
+    def get_game(self):
+        """Returns the GameLogic advanced by this engine."""
+        return self._game
+
+    def close(self):
+        """Releases the level of the game, see GameLogic.close."""
+        self._game.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def fork(self):
+        """
+        Returns a new GameEngine over a fork of the game, see GameLogic.fork.
+        """
+        engine = GameEngine(self._game.fork())
+        engine._steps = self._steps
+        return engine
+
+    def get_steps(self):
+        """Returns the number of moves applied by this engine."""
+        return self._steps
+
+    def step(self, direction, time=None):
+        """
+        Applies a single move, exactly as GameApp.play does. Anything which
+        is not one of DIRECTIONS is ignored and costs no move.
+
+        Parameters:
+            direction (str): The direction for the player to travel in
+            time: The time of the move, recorded in the journal of the game
+                if it has one
+
+        Returns:
+            (bool): True if the player changed position, otherwise False
+        """
+        if direction not in DIRECTIONS:
+            return False
+        self._steps += 1
+        return self._game.play_move(direction, time)
+
+    def step_many(self, moves):
+        """
+        Applies a sequence of moves, stopping as soon as the game is won
+        or lost.
+
+        Parameters:
+            moves (iterable<str>): The directions to travel in, for example
+                the string "DDSW"
+
+        Returns:
+            (int): The number of moves that were applied
+        """
+        game = self._game
+        player = game.get_player()
+        directions = DIRECTIONS
+        applied = 0
+        if game.get_journal() is not None:
+            play_move = game.play_move
+            for direction in moves:
+                if game.won() or player.moves_remaining() <= 0:
+                    break
+                if direction in directions:
+                    applied += 1
+                    play_move(direction)
+            self._steps += applied
+            return applied
+
+        collision_check = game.collision_check
+        move_player = game.move_player
+        get_entity = game.get_entity
+        for direction in moves:
+            if game.won() or player.moves_remaining() <= 0:
+                break
+            if direction not in directions:
+                continue
+
+            applied += 1
+            player.change_move_count(-1)
+            if not collision_check(direction):
+                move_player(direction)
+                entity = get_entity(player.get_position())
+                if entity is not None:
+                    entity.on_hit(game)
+        self._steps += applied
+        return applied
+
+    def moves_remaining(self):
+        """Returns the number of moves the player has left."""
+        return self._game.get_player().moves_remaining()
+
+    def status(self):
+        """
+        Returns the state of the game. A game which is won is not also
+        reported as lost, even if the winning move was the last one.
+
+        Returns:
+            (str): One of RUNNING, WON or LOST
+        """
+        if self._game.won():
+            return WON
+        if self._game.check_game_over():
+            return LOST
+        return RUNNING
+
+    def is_over(self):
+        """Returns True if the game has been won or lost."""
+        return self.status() != RUNNING
@@ -0,0 +1,167 @@
+"""
+A reset/step environment around GameLogic in the style of Gymnasium.
+
+The observation is a size x size NumPy array of cell codes which is a view
+onto a bytearray owned by the environment. Each step only rewrites the few
+cells the move changed, and returns the same array, so nothing is copied
+or rebuilt per step; copy the observation to keep it. A small vector holds
+the moves left, whether a key is held and the lives left.
+
+Usage:
+    env = KeyCaveEnv("game2.txt")
+    observation, info = env.reset()
+    observation, reward, terminated, truncated, info = env.step(3)
+"""
+
+import operator
+
+import numpy as np
+
+from game_logic import KEY, DOOR, WALL, MOVE_INCREASE, DIRECTIONS, GameLogic
+from solver import walkable_cells
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+# the actions, in the order of DIRECTIONS, and undoing the last move with a life
+ACTIONS = list(DIRECTIONS)
+USE_LIFE = len(ACTIONS)
+
+# the codes of the cells of an observation
+EMPTY_CODE = 0
+WALL_CODE = 1
+KEY_CODE = 2
+DOOR_CODE = 3
+MOVE_INCREASE_CODE = 4
+PLAYER_CODE = 5
+ENTITY_CODES = {WALL: WALL_CODE, KEY: KEY_CODE, DOOR: DOOR_CODE,
+                MOVE_INCREASE: MOVE_INCREASE_CODE}
+
+# the entries of the status vector
+MOVES = 0
+HAS_KEY = 1
+LIVES = 2
+
+class KeyCaveEnv:
+    """An environment which plays a level, one action per step."""
+    def __init__(self, dungeon_name, moves=None, lives=0, compact=True):
+        """
+        Constructor of KeyCaveEnv. The level is read once, and each reset
+        starts from a fork of it.
+
+        Parameters:
+            dungeon_name (str): The name of the file to load the level from
+            moves (int): The moves the player starts with, by default the
+                ones given to the level in GAME_LEVELS
+            lives (int): The number of times USE_LIFE may undo a move
+            compact (bool): If True, the level is stored in a CompactGrid
+        """
+        self._level = GameLogic(dungeon_name, compact, moves)
+        self._lives = lives
+        self._size = size = self._level.get_dungeon_size()
+
+        blocked = walkable_cells(self._level).translate(bytes([WALL_CODE, EMPTY_CODE]) + bytes(254))
+        self._initial = bytearray(blocked)
+        index = self._level.get_index()
+        for entity_id in (KEY, DOOR, MOVE_INCREASE):
+            for row, col in index.get_present(entity_id):
+                if 0 <= row < size and 0 <= col < size:
+                    self._initial[row * size + col] = ENTITY_CODES[entity_id]
+        row, col = self._level.get_player().get_position()
+        self._initial[row * size + col] = PLAYER_CODE
+
+        self._grid = bytearray(self._initial)
+        self._observation = np.frombuffer(self._grid, dtype=np.uint8).reshape(size, size)
+        self._status = np.zeros(3, dtype=np.int64)
+        self._game = None
+        self._lives_left = lives
+        self._info = {"status": self._status, "won": False}
+
+    def get_observation(self):
+        """Returns the size x size array of cell codes, updated in place by each step."""
+        return self._observation
+
+    def get_status(self):
+        """Returns the vector of the moves left, key held and lives left, updated in place."""
+        return self._status
+
+    def get_game(self):
+        """Returns the GameLogic being played."""
+        return self._game
+
+    def reset(self, seed=None, options=None):
+        """
+        Starts a new game of the level.
+
+        Parameters:
+            seed (int): Unused, as the game has no randomness
+            options (dict): Unused
+
+        Returns:
+            (tuple<ndarray, dict>): The observation and the info
+        """
+        self._game = self._level.fork()
+        if self._lives:
+            self._game.start_journal()
+        self._lives_left = self._lives
+        self._grid[:] = self._initial
+        self._update_status()
+        self._info["won"] = self._game.won()
+        return self._observation, self._info
+
+    def step(self, action):
+        """
+        Plays an action.
+
+        Parameters:
+            action (int | str): The index of a direction in ACTIONS, as any
+                integer including a NumPy one, the direction itself, or USE_LIFE
+
+        Returns:
+            (tuple<ndarray, float, bool, bool, dict>): The observation, the
+                reward (1 for winning, -1 for running out of moves, otherwise
+                0), whether the game is over, whether it was cut short
+                (never) and the info, which holds the status vector and
+                whether the game is won and is reused by every step
+        """
+        game = self._game
+        player = game.get_player()
+        old_position = player.get_position()
+        if action == USE_LIFE:
+            # the cell the player leaves is where an undone item returns
+            if self._lives_left > 0 and game.can_undo():
+                game.undo()
+                self._lives_left -= 1
+        else:
+            game.play_move(action if isinstance(action, str) else ACTIONS[operator.index(action)])
+        self._draw(old_position)
+        self._draw(player.get_position())
+        self._update_status()
+
+        won = self._info["won"] = game.won()
+        if won:
+            return self._observation, 1.0, True, False, self._info
+        if game.check_game_over():
+            return self._observation, -1.0, True, False, self._info
+        return self._observation, 0.0, False, False, self._info
+
+    def _draw(self, position):
+        """Writes the code of the cell at position into the observation."""
+        row, col = position
+        size = self._size
+        if not (0 <= row < size and 0 <= col < size):
+            return
+        if position == self._game.get_player().get_position():
+            code = PLAYER_CODE
+        else:
+            entity = self._game.get_entity(position)
+            code = EMPTY_CODE if entity is None else ENTITY_CODES.get(entity.get_id(), EMPTY_CODE)
+        self._grid[row * size + col] = code
+
+    def _update_status(self):
+        """Writes the moves left, key held and lives left into the status vector."""
+        player = self._game.get_player()
+        status = self._status
+        status[MOVES] = player.moves_remaining()
+        status[HAS_KEY] = any(item.get_id() == KEY for item in player.get_inventory())
+        status[LIVES] = self._lives_left
@@ -0,0 +1,271 @@
+"""
+Evaluates an agent over a library of levels and many seeds.
+
+An agent is made for each episode by calling an agent factory with the seed
+of the episode, and is then called with the GameLogic before every move,
+returning the direction to travel in; anything else gives up the episode.
+Episodes are spread over a pool of processes. The levels are read once and
+placed in a block of shared memory which every worker reads them from, so
+no worker opens a level file; each worker builds a level once and forks it
+for every episode.
+
+The report gives the win rate of each level, the moves used compared with
+its par, and the time taken by the episodes and the moves of the agent.
+
+Usage:
+    python evaluate.py levels/ -a evaluate:solver_agent -s 100 -o report.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+
+from game_logic import GAME_LEVELS, DIRECTIONS, GameLogic
+from engine import GameEngine
+from solver import Solver
+from parallel import imap_tasks
+from validator import find_levels
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+SEEDS = 10
+
+def random_agent(seed):
+    """Returns an agent which moves in random directions, seeded by seed."""
+    generator = random.Random(seed)
+    directions = list(DIRECTIONS)
+    return lambda game: generator.choice(directions)
+
+def solver_agent(seed):
+    """Returns an agent which follows the shortest winning moves found by Solver."""
+    plan = []
+
+    def agent(game):
+        if not plan:
+            plan.extend(reversed(Solver(game).solve() or "W"))
+        return plan.pop()
+    return agent
+
+def load_agent(name):
+    """
+    Finds an agent factory by name.
+
+    Parameters:
+        name (str): "module:function", for example "evaluate:random_agent"
+
+    Returns:
+        (callable): The factory, which takes a seed and returns an agent
+    """
+    module, _, function = name.partition(":")
+    return getattr(importlib.import_module(module), function)
+
+class LevelLibrary:
+    """
+    Level files copied into a block of shared memory, which any process
+    can read the levels from by the name of the block.
+    """
+    def __init__(self, filenames):
+        """
+        Constructor of LevelLibrary, which reads every level once.
+
+        Parameters:
+            filenames (list<str>): The level files
+        """
+        contents = []
+        for filename in filenames:
+            with open(filename, "rb") as file:
+                contents.append(file.read())
+        self._extents = []
+        start = 0
+        for content in contents:
+            self._extents.append((start, len(content)))
+            start += len(content)
+        self._memory = shared_memory.SharedMemory(create=True, size=max(start, 1))
+        for (start, length), content in zip(self._extents, contents):
+            self._memory.buf[start:start + length] = content
+
+    def get_name(self):
+        """Returns the name of the shared memory block."""
+        return self._memory.name
+
+    def get_extents(self):
+        """Returns the (start, length) of each level in the block."""
+        return self._extents
+
+    def close(self):
+        """Frees the shared memory block."""
+        self._memory.close()
+        self._memory.unlink()
+
+# the state of each worker process, set by _start_worker
+_worker = {}
+
+def _start_worker(memory_name, extents, names, budgets, agent_name):
+    """Attaches a worker to the shared levels."""
+    _worker["memory"] = shared_memory.SharedMemory(name=memory_name)
+    _worker["extents"] = extents
+    _worker["names"] = names
+    _worker["budgets"] = budgets
+    _worker["agent"] = load_agent(agent_name)
+    # level index -> (GameLogic to fork, par)
+    _worker["levels"] = {}
+
+def _level(index):
+    """Returns the GameLogic and par of a level, building them the first time."""
+    level = _worker["levels"].get(index)
+    if level is None:
+        start, length = _worker["extents"][index]
+        text = bytes(_worker["memory"].buf[start:start + length]).decode()
+        game = GameLogic(_worker["names"][index], moves=_worker["budgets"][index],
+                         dungeon=text.splitlines())
+        level = _worker["levels"][index] = (game, Solver(game).par())
+    return level
+
+def _run_episode(task):
+    """Plays an episode of a level with a new agent, for Pool.imap_unordered."""
+    index, seed = task
+    level, par = _level(index)
+    game = level.fork()
+    engine = GameEngine(game)
+    agent = _worker["agent"](seed)
+    thinking = 0
+    start = time.perf_counter()
+    while not engine.is_over():
+        before = time.perf_counter()
+        direction = agent(game)
+        thinking += time.perf_counter() - before
+        if direction not in DIRECTIONS:
+            # the engine would ignore it, so the agent could loop forever
+            break
+        engine.step(direction)
+    seconds = time.perf_counter() - start
+    return {
+        "level": _worker["names"][index],
+        "seed": seed,
+        "won": game.won(),
+        "moves": engine.get_steps(),
+        "par": par,
+        "seconds": seconds,
+        "agent_seconds": thinking,
+        }
+
+def _percentile(values, fraction):
+    """Returns a percentile of a list of numbers, or None if it is empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+def summarise(episodes):
+    """
+    Summarises episodes per level and over all of them.
+
+    Parameters:
+        episodes (list<dict>): The results of the episodes
+
+    Returns:
+        (dict): For each level and for "all": the episodes, the win rate,
+            the mean moves of the wins over par, and the 50th and 99th
+            percentile seconds of an episode
+    """
+    groups = {"all": episodes}
+    for episode in episodes:
+        groups.setdefault(episode["level"], []).append(episode)
+    summary = {}
+    for name, group in groups.items():
+        wins = [episode for episode in group if episode["won"]]
+        ratios = [episode["moves"] / episode["par"] for episode in wins if episode["par"]]
+        seconds = [episode["seconds"] for episode in group]
+        summary[name] = {
+            "episodes": len(group),
+            "win_rate": len(wins) / len(group) if group else None,
+            "moves_over_par": sum(ratios) / len(ratios) if ratios else None,
+            "p50_seconds": _percentile(seconds, 0.5),
+            "p99_seconds": _percentile(seconds, 0.99),
+            }
+    return summary
+
+def evaluate(filenames, agent_name, seeds=SEEDS, moves=None, workers=None):
+    """
+    Plays every level with a new agent for each seed over a pool of processes.
+
+    Parameters:
+        filenames (list<str>): The level files
+        agent_name (str): The agent factory, as "module:function"
+        seeds (int): The number of episodes of each level, seeded 0 to seeds - 1
+        moves (int): The move budget for levels which are not in GAME_LEVELS
+        workers (int): The number of processes, by default one per core
+
+    Returns:
+        (dict): The episodes, their summary from summarise and the seconds
+            the evaluation took
+    """
+    budgets = [GAME_LEVELS.get(os.path.basename(filename), moves) for filename in filenames]
+    missing = [filename for filename, budget in zip(filenames, budgets) if budget is None]
+    if missing:
+        raise ValueError(f"no move budget for {', '.join(missing)}, give one with moves")
+
+    start = time.perf_counter()
+    library = LevelLibrary(filenames)
+    tasks = [(index, seed) for index in range(len(filenames)) for seed in range(seeds)]
+    try:
+        episodes = list(imap_tasks(_run_episode, tasks, workers, _start_worker,
+                                   (library.get_name(), library.get_extents(), filenames,
+                                    budgets, agent_name)))
+    finally:
+        # the episodes may have been played in this process
+        memory = _worker.pop("memory", None)
+        if memory is not None:
+            _worker.clear()
+            memory.close()
+        library.close()
+    episodes.sort(key=lambda episode: (episode["level"], episode["seed"]))
+    return {
+        "agent": agent_name,
+        "seconds": time.perf_counter() - start,
+        "summary": summarise(episodes),
+        "episodes": episodes,
+        }
+
+def main(argv=None):
+    """Evaluates an agent on the levels given on the command line and writes the report as JSON."""
+    parser = argparse.ArgumentParser(description="Evaluate an agent on Key Cave Adventure levels.")
+    parser.add_argument("levels", nargs="+", help="level files, directories or glob patterns")
+    parser.add_argument("-a", "--agent", default="evaluate:random_agent",
+                        help="agent factory as module:function (default: evaluate:random_agent)")
+    parser.add_argument("-s", "--seeds", type=int, default=SEEDS,
+                        help="episodes of each level")
+    parser.add_argument("-m", "--moves", type=int, default=None,
+                        help="move budget for levels which are not in GAME_LEVELS")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of processes (default: one per core)")
+    parser.add_argument("-o", "--output", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        report = evaluate(find_levels(args.levels), args.agent, args.seeds,
+                          args.moves, args.workers)
+    except ValueError as error:
+        parser.error(str(error))
+    except OSError as error:
+        parser.error(f"cannot read {error.filename}: {error.strerror}")
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    summary = report["summary"]["all"]
+    win_rate = "n/a" if summary["win_rate"] is None else f"{summary['win_rate']:.2%}"
+    print(f"{summary['episodes']} episodes, win rate {win_rate}, "
+          f"{report['seconds']:.2f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
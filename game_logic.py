@@ -0,0 +1,1314 @@
+"""The model of the Key Cave Adventure Game: the dungeon and its entities."""
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+import re
+from collections import deque
+from collections.abc import MutableMapping
+
+GAME_LEVELS = {
+    "game1.txt": 7,
+    "game2.txt": 12,
+    "game3.txt": 19
+    }
+
+PLAYER = "O"
+KEY = "K"
+DOOR = "D"
+WALL = "#"
+MOVE_INCREASE = "M"
+SPACE = " "
+
+DIRECTIONS = {
+    "W": (-1, 0),
+    "S": (1, 0),
+    "D": (0, 1),
+    "A": (0, -1)
+    }
+
+# the first bytes of a binary level, see level_format.py
+BINARY_MAGIC = b"KCAL"
+
+def is_binary_level(filename):
+    """
+    Returns True if filename starts with the magic of a binary level. This
+    is here rather than in level_format.py so that text levels are loaded
+    without importing it.
+    """
+    try:
+        with open(filename, "rb") as file:
+            return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    except OSError:
+        return False
+
+def load_game(filename):
+    """Create a 2D array of string representing the dungeon to display.
+
+    Parameters:
+        filename (str): A string representing the name of the level.
+
+    Returns:
+        (list<list<str>>): A 2D array of strings representing the
+            dungeon.
+    """
+    dungeon_map = []
+    with open(filename,"r") as file:
+        for lines in file:
+            line = lines.strip('\n')
+            dungeon_map.append(line)
+    return dungeon_map
+
+class Entity:
+    """ """
+
+    __slots__ = ("_collidable",)
+
+    _id = "Entity"
+
+    def __init__(self):
+        """
+        Something the player can interact with
+        """
+        self._collidable = True
+
+    def get_id(self):
+        """ """
+        return self._id
+
+    def set_collide(self, collidable):
+        """ """
+        self._collidable = collidable
+
+    def can_collide(self):
+        """ """
+        return self._collidable
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({self._id!r})"
+
+    def __repr__(self):
+        return str(self)
+
+
+class Wall(Entity):
+    """ """
+
+    __slots__ = ()
+
+    _id = WALL
+
+    def __init__(self):
+        """ """
+        super().__init__()
+        self.set_collide(False)
+
+
+class Item(Entity):
+    """ """
+
+    __slots__ = ()
+
+    def on_hit(self, game):
+        """ """
+        raise NotImplementedError
+
+
+class Key(Item):
+    """ """
+
+    __slots__ = ()
+
+    _id = KEY
+
+    def on_hit(self, game):
+        """ """
+        player = game.get_player()
+        player.add_item(self)
+        game.remove_entity(player.get_position())
+
+
+class MoveIncrease(Item):
+    """ """
+
+    __slots__ = ("_moves",)
+
+    _id = MOVE_INCREASE
+
+    def __init__(self, moves=5):
+        """ """
+        super().__init__()
+        self._moves = moves
+
+    def get_moves(self):
+        """Returns the number of moves given to the player who picks this up."""
+        return self._moves
+
+    def on_hit(self, game):
+        """ """
+        player = game.get_player()
+        player.change_move_count(self._moves)
+        game.remove_entity(player.get_position())
+
+
+class Door(Entity):
+    """ """
+
+    __slots__ = ()
+
+    _id = DOOR
+
+    def on_hit(self, game):
+        """ """
+        player = game.get_player()
+        for item in player.get_inventory():
+            if item.get_id() == KEY:
+                game.remove_entity(player.get_position())
+                game.set_win(True)
+                return
+
+class Player(Entity):
+    """ """
+
+    __slots__ = ("_move_count", "_inventory", "_position")
+
+    _id = PLAYER
+
+    def __init__(self, move_count):
+        """ """
+        super().__init__()
+        self._move_count = move_count
+        self._inventory = []
+        self._position = None
+
+    def set_position(self, position):
+        """ """
+        self._position = position
+
+    def get_position(self):
+        """ """
+        return self._position
+
+    def change_move_count(self, number):
+        """
+        Parameters:
+            number (int): number to be added to move count
+        """
+        self._move_count += number
+
+    def moves_remaining(self):
+        """ """
+        return self._move_count
+
+    def add_item(self, item):
+        """Adds item (Item) to inventory
+        """
+        self._inventory.append(item)
+
+    def get_inventory(self):
+        """ """
+        return self._inventory
+
+    def copy(self):
+        """Returns a new Player in the same state, with its own inventory."""
+        player = Player(self._move_count)
+        player._inventory = list(self._inventory)
+        player._position = self._position
+        return player
+
+class EntityIndex:
+    """
+    A registry of the entities of a level, indexed by their id.
+
+    It remembers where each kind of entity was placed in the level and
+    which of those positions still hold one, so that questions such as
+    "where are all the keys" never require scanning the dungeon.
+    """
+    def __init__(self):
+        """Constructor of EntityIndex."""
+        # entity id -> positions in the level file, in reading order
+        self._origins = {}
+        # entity id -> positions which currently hold such an entity
+        self._present = {}
+        # entity ids whose set of present positions is shared with a fork
+        self._shared = set()
+
+    def fork(self):
+        """
+        Returns a copy of the index. The positions are shared until either
+        index changes them, so a fork costs one entry per entity id.
+        """
+        index = EntityIndex()
+        index._origins = self._origins
+        index._present = dict(self._present)
+        self._shared = set(self._present)
+        index._shared = set(self._present)
+        return index
+
+    def _own(self, entity_id):
+        """Copies the present positions of entity_id if they are shared with a fork."""
+        if entity_id in self._shared:
+            self._shared.discard(entity_id)
+            self._present[entity_id] = set(self._present[entity_id])
+
+    def add_origin(self, entity_id, position):
+        """
+        Records that the level places an entity with entity_id at position.
+
+        Parameters:
+            entity_id (str): The id of the entity
+            position (tuple<int, int>): The (row, col) position in the level
+        """
+        self._origins.setdefault(entity_id, []).append(position)
+
+    def add(self, position, entity_id):
+        """Records that an entity with entity_id is now at position."""
+        self._own(entity_id)
+        self._present.setdefault(entity_id, set()).add(position)
+
+    def remove(self, position, entity_id):
+        """Records that the entity with entity_id has left position."""
+        if entity_id in self._present:
+            self._own(entity_id)
+            self._present[entity_id].discard(position)
+
+    def get_origins(self, entity_id):
+        """
+        Returns the positions where the level places an entity.
+
+        Parameters:
+            entity_id (str): The id of the entity
+
+        Returns:
+            (list<tuple<int, int>>): The positions, in reading order
+        """
+        return self._origins.get(entity_id, [])
+
+    def get_present(self, entity_id):
+        """
+        Returns the positions which currently hold an entity.
+
+        Parameters:
+            entity_id (str): The id of the entity
+
+        Returns:
+            (set<tuple<int, int>>): The positions, which must not be modified
+        """
+        return self._present.get(entity_id, set())
+
+    def get_ids(self):
+        """Returns the ids of the entities which the level places or which are in it now."""
+        return set(self._origins) | set(self._present)
+
+    def is_present(self, entity_id):
+        """Returns True if at least one entity with entity_id is still in the level."""
+        return bool(self._present.get(entity_id))
+
+    def get_changes(self):
+        """
+        Returns how the entities differ from where the level places them.
+        Walls never move, so they are not compared.
+
+        Returns:
+            (frozenset<tuple<tuple<int, int>, str>>): Each changed position
+                with the id of the entity there now, or None if it was removed
+        """
+        changes = {}
+        for entity_id in self.get_ids():
+            if entity_id == WALL:
+                continue
+            origins = set(self.get_origins(entity_id))
+            present = self.get_present(entity_id)
+            for position in origins - present:
+                changes.setdefault(position, None)
+            for position in present - origins:
+                changes[position] = entity_id
+        return frozenset(changes.items())
+
+# Walls have no state of their own, so every level shares this one
+WALL_ENTITY = Wall()
+
+# The codes stored for each cell of a CompactGrid
+EMPTY_CELL = 0
+WALL_CELL = 1
+ENTITY_CELL = 2
+
+# Translates the bytes of a level line into WALL_CELL for walls, otherwise EMPTY_CELL
+_WALL_CODES = bytes(WALL_CELL if byte == ord(WALL) else EMPTY_CELL for byte in range(256))
+_NON_WALL_ENTITY = re.compile(f"[^{re.escape(WALL)}{re.escape(SPACE)}]")
+_ANY_CELL = re.compile(b"[^\\x00]")
+_WALL_CELLS = re.compile(re.escape(bytes([WALL_CELL])))
+# Marks a position of an OverlayGrid which has not been changed
+_UNCHANGED = object()
+
+class CompactGrid(MutableMapping):
+    """
+    A dictionary of (row, col) positions to entities, stored as a flat
+    bytearray of cell codes rather than one dict entry per cell.
+
+    Walls are stored as WALL_CELL and read back as WALL_ENTITY, so they cost
+    a single byte each. Any other entity is kept in a small side table. A
+    second bytearray records which cells cannot be entered, which is
+    computed when an entity is placed; an entity whose collidability
+    changes afterwards must be placed again.
+    """
+    def __init__(self, rows, cols, cells=None, blocked=None, walls=0):
+        """
+        Constructor of CompactGrid. The cell codes and blocked cells may be
+        given as writable buffers, such as views of a BinaryLevel, which are
+        then used without copying them.
+
+        Parameters:
+            rows (int): The number of rows in the grid
+            cols (int): The number of columns in the grid
+            cells (bytearray): The code of each cell, by default all empty
+            blocked (bytearray): 1 for each blocked cell, by default none
+            walls (int): The number of WALL_CELL codes in cells
+        """
+        self._rows = rows
+        self._cols = cols
+        self._cells = bytearray(rows * cols) if cells is None else cells
+        self._blocked = bytearray(rows * cols) if blocked is None else blocked
+        # flat index -> entity, for every cell holding ENTITY_CELL
+        self._entities = {}
+        self._walls = walls
+
+    def load_row(self, row, line):
+        """
+        Stores the walls of a line of the level file. Other entities in the
+        line must be placed separately.
+
+        Parameters:
+            row (int): The row of the line
+            line (str): The line of the level file
+        """
+        codes = line.encode("ascii", "replace").translate(_WALL_CODES)
+        start = row * self._cols
+        end = start + len(codes)
+        self._walls += codes.count(WALL_CELL) - self._cells[start:end].count(WALL_CELL)
+        self._cells[start:end] = codes
+        self._blocked[start:end] = codes
+
+    def get_cells(self):
+        """Returns the bytearray of cell codes, one per cell in reading order."""
+        return self._cells
+
+    def get_blocked(self):
+        """Returns the bytearray holding 1 for each cell which cannot be entered."""
+        return self._blocked
+
+    def get_columns(self):
+        """Returns the number of columns, which is the stride of each row in the arrays."""
+        return self._cols
+
+    def is_blocked(self, row, col):
+        """Returns True if the cell at (row, col), which must be in the grid, cannot be entered."""
+        return self._blocked[row * self._cols + col] == 1
+
+    def blocked_row(self, row, length):
+        """
+        Returns which cells of a row cannot be entered.
+
+        Parameters:
+            row (int): The row
+            length (int): The number of cells to return, at most the number of columns
+
+        Returns:
+            (bytes): 1 for each blocked cell and 0 otherwise
+        """
+        start = row * self._cols
+        return bytes(self._blocked[start:start + length])
+
+    def wall_positions(self):
+        """Returns the positions of the walls in reading order."""
+        cols = self._cols
+        return [divmod(match.start(), cols) for match in _WALL_CELLS.finditer(self._cells)]
+
+    def _to_index(self, position):
+        """Returns the flat index of position, or -1 if it is outside the grid."""
+        row, col = position
+        if 0 <= row < self._rows and 0 <= col < self._cols:
+            return row * self._cols + col
+        return -1
+
+    def get(self, position, default=None):
+        """Returns the entity at position, or default if there is none."""
+        index = self._to_index(position)
+        if index < 0:
+            return default
+        code = self._cells[index]
+        if code == EMPTY_CELL:
+            return default
+        if code == WALL_CELL:
+            return WALL_ENTITY
+        return self._entities[index]
+
+    def __getitem__(self, position):
+        entity = self.get(position)
+        if entity is None:
+            raise KeyError(position)
+        return entity
+
+    def __contains__(self, position):
+        index = self._to_index(position)
+        return index >= 0 and self._cells[index] != EMPTY_CELL
+
+    def __setitem__(self, position, entity):
+        index = self._to_index(position)
+        if index < 0:
+            raise KeyError(position)
+        if self._cells[index] == WALL_CELL:
+            self._walls -= 1
+        if entity is WALL_ENTITY:
+            self._cells[index] = WALL_CELL
+            self._entities.pop(index, None)
+            self._walls += 1
+        else:
+            self._cells[index] = ENTITY_CELL
+            self._entities[index] = entity
+        self._blocked[index] = 0 if entity.can_collide() else 1
+
+    def __delitem__(self, position):
+        if position not in self:
+            raise KeyError(position)
+        index = self._to_index(position)
+        if self._cells[index] == WALL_CELL:
+            self._walls -= 1
+        self._cells[index] = EMPTY_CELL
+        self._blocked[index] = 0
+        self._entities.pop(index, None)
+
+    def __iter__(self):
+        cols = self._cols
+        for match in _ANY_CELL.finditer(self._cells):
+            yield divmod(match.start(), cols)
+
+    def __len__(self):
+        return self._walls + len(self._entities)
+
+class OverlayGrid(MutableMapping):
+    """
+    A dictionary of (row, col) positions to entities over a base dictionary
+    which is shared with other games and never modified, for forking a game.
+
+    Entities placed or removed are kept in a small dictionary of changes, so
+    copying an OverlayGrid costs one entry per change rather than one per
+    cell. The base may be a dict, a CompactGrid or a ChunkedGrid.
+    """
+    def __init__(self, base, changes=None):
+        """
+        Constructor of OverlayGrid.
+
+        Parameters:
+            base (MutableMapping): The entities of the level, which must not
+                be modified while the OverlayGrid is used
+            changes (dict<tuple<int, int>: Entity>): The entity placed at
+                each changed position, or None if it was removed
+        """
+        self._base = base
+        self._changes = {} if changes is None else changes
+
+    def get_base(self):
+        """Returns the shared dictionary under the changes."""
+        return self._base
+
+    def copy(self):
+        """Returns a new OverlayGrid over the same base with a copy of the changes."""
+        return OverlayGrid(self._base, dict(self._changes))
+
+    def state(self):
+        """
+        Returns the changes as a hashable value, which is equal for two
+        OverlayGrid over the same base holding the same entities.
+
+        Returns:
+            (frozenset<tuple<tuple<int, int>, str>>): Each changed position
+                with the id of the entity placed there, or None if removed
+        """
+        return frozenset((position, None if entity is None else entity.get_id())
+                         for position, entity in self._changes.items())
+
+    def is_blocked(self, row, col):
+        """Returns True if the cell at (row, col), which must be in the level, cannot be entered."""
+        if self._changes:
+            entity = self._changes.get((row, col), _UNCHANGED)
+            if entity is not _UNCHANGED:
+                return entity is not None and not entity.can_collide()
+        return self._base.is_blocked(row, col)
+
+    def blocked_row(self, row, length):
+        """Returns which cells of a row cannot be entered, see CompactGrid.blocked_row."""
+        blocked = bytearray(self._base.blocked_row(row, length))
+        for (change_row, col), entity in self._changes.items():
+            if change_row == row and 0 <= col < length:
+                blocked[col] = 1 if entity is not None and not entity.can_collide() else 0
+        return bytes(blocked)
+
+    def wall_positions(self):
+        """Returns the positions of the walls in reading order."""
+        changes = self._changes
+        positions = [position for position in self._base.wall_positions()
+                     if changes.get(position, WALL_ENTITY) is WALL_ENTITY]
+        positions.extend(position for position, entity in changes.items()
+                         if entity is WALL_ENTITY and position not in self._base)
+        return sorted(positions)
+
+    def get(self, position, default=None):
+        """Returns the entity at position, or default if there is none."""
+        if self._changes:
+            entity = self._changes.get(position, _UNCHANGED)
+            if entity is not _UNCHANGED:
+                return default if entity is None else entity
+        return self._base.get(position, default)
+
+    def __getitem__(self, position):
+        entity = self.get(position)
+        if entity is None:
+            raise KeyError(position)
+        return entity
+
+    def __contains__(self, position):
+        return self.get(position) is not None
+
+    def __setitem__(self, position, entity):
+        if self._base.get(position) is entity:
+            # putting back the entity of the base, as undo does, is no change
+            self._changes.pop(position, None)
+        else:
+            self._changes[position] = entity
+
+    def __delitem__(self, position):
+        if position not in self:
+            raise KeyError(position)
+        if position in self._base:
+            self._changes[position] = None
+        else:
+            del self._changes[position]
+
+    def __iter__(self):
+        changes = self._changes
+        for position in self._base:
+            if changes.get(position, _UNCHANGED) is not None:
+                yield position
+        for position, entity in list(changes.items()):
+            if entity is not None and position not in self._base:
+                yield position
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+class JournalEntry:
+    """The changes made to a game by a single move, so that it can be undone and redone."""
+
+    __slots__ = ("_old_position", "_new_position", "_moves", "_items",
+                 "_removed", "_won_before", "_won_after", "_time")
+
+    def __init__(self, old_position, new_position, moves, items, removed,
+                 won_before, won_after, time):
+        """
+        Parameters:
+            old_position (tuple<int, int>): The position before the move
+            new_position (tuple<int, int>): The position after the move
+            moves (int): The change in the number of moves left
+            items (list<Item>): The items added to the inventory
+            removed (Entity): The entity removed from new_position, or None
+            won_before (bool): Whether the game was won before the move
+            won_after (bool): Whether the game was won after the move
+            time: The time the move was made at, as given by the caller
+        """
+        self._old_position = old_position
+        self._new_position = new_position
+        self._moves = moves
+        self._items = items
+        self._removed = removed
+        self._won_before = won_before
+        self._won_after = won_after
+        self._time = time
+
+    def get_time(self):
+        """Returns the time the move was made at."""
+        return self._time
+
+    def to_state(self):
+        """Returns the entry as a list which can be saved as JSON."""
+        return [self._old_position, self._new_position, self._moves,
+                [entity_state(item) for item in self._items],
+                entity_state(self._removed), self._won_before, self._won_after,
+                self._time]
+
+    @classmethod
+    def from_state(cls, state):
+        """Returns a new JournalEntry from the list returned by to_state."""
+        old_position, new_position, moves, items, removed, won_before, won_after, time = state
+        return cls(tuple(old_position), tuple(new_position), moves,
+                   [entity_from_state(item) for item in items],
+                   entity_from_state(removed), won_before, won_after, time)
+
+    def undo(self, game):
+        """Reverts the changes of the move in game."""
+        player = game.get_player()
+        player.set_position(self._old_position)
+        player.change_move_count(-self._moves)
+        if self._items:
+            del player.get_inventory()[-len(self._items):]
+        if self._removed is not None:
+            game.add_entity(self._new_position, self._removed)
+        game.set_win(self._won_before)
+
+    def redo(self, game):
+        """Applies the changes of the move to game again."""
+        player = game.get_player()
+        player.set_position(self._new_position)
+        player.change_move_count(self._moves)
+        player.get_inventory().extend(self._items)
+        if self._removed is not None:
+            game.remove_entity(self._new_position)
+        game.set_win(self._won_after)
+
+class Journal:
+    """
+    The moves made in a game, most recent last, with the moves which were
+    undone kept for redoing until a new move is made.
+    """
+    def __init__(self, max_entries=None):
+        """
+        Parameters:
+            max_entries (int): The number of moves which can be undone, the
+                oldest ones are forgotten first. By default there is no limit.
+        """
+        self._undo = deque(maxlen=max_entries)
+        self._redo = []
+
+    def record(self, entry):
+        """Adds the JournalEntry of a new move, which can no longer be followed by a redo."""
+        self._undo.append(entry)
+        self._redo.clear()
+
+    def can_undo(self):
+        """Returns True if there is a move to undo."""
+        return bool(self._undo)
+
+    def can_redo(self):
+        """Returns True if there is an undone move to redo."""
+        return bool(self._redo)
+
+    def pop_undo(self):
+        """Returns the JournalEntry of the most recent move, moving it to the redo stack."""
+        entry = self._undo.pop()
+        self._redo.append(entry)
+        return entry
+
+    def pop_redo(self):
+        """Returns the JournalEntry of the most recently undone move, moving it back."""
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        return entry
+
+    def __len__(self):
+        return len(self._undo)
+
+    def copy(self):
+        """Returns a new Journal of the same moves, which are shared as they never change."""
+        journal = Journal(self._undo.maxlen)
+        journal._undo.extend(self._undo)
+        journal._redo.extend(self._redo)
+        return journal
+
+    def to_state(self):
+        """Returns the journal as a dict which can be saved as JSON."""
+        return {
+            "max_entries": self._undo.maxlen,
+            "undo": [entry.to_state() for entry in self._undo],
+            "redo": [entry.to_state() for entry in self._redo],
+            }
+
+    @classmethod
+    def from_state(cls, state):
+        """Returns a new Journal from the dict returned by to_state."""
+        journal = cls(state["max_entries"])
+        journal._undo.extend(JournalEntry.from_state(entry) for entry in state["undo"])
+        journal._redo.extend(JournalEntry.from_state(entry) for entry in state["redo"])
+        return journal
+
+def entity_state(entity):
+    """
+    Returns a description of an entity which can be saved as JSON.
+
+    Parameters:
+        entity (Entity): An entity of ENTITY_TYPES, or None
+
+    Returns:
+        (str | list | None): The id of the entity, with the moves it gives
+            for a MoveIncrease
+    """
+    if entity is None:
+        return None
+    if isinstance(entity, MoveIncrease):
+        return [entity.get_id(), entity.get_moves()]
+    return entity.get_id()
+
+def entity_from_state(state):
+    """Returns a new entity from the description returned by entity_state."""
+    if state is None:
+        return None
+    if isinstance(state, list):
+        entity_id, moves = state
+        return MoveIncrease(moves)
+    if state == WALL:
+        return WALL_ENTITY
+    return ENTITY_TYPES[state]()
+
+ENTITY_TYPES = {
+    KEY: Key,
+    DOOR: Door,
+    WALL: Wall,
+    MOVE_INCREASE: MoveIncrease
+    }
+
+class GameLogic:
+    """ """
+    def __init__(self, dungeon_name, compact=False, moves=None, chunked=False,
+                 tile_size=None, max_tiles=None, dungeon=None):
+        """
+        Parameters:
+            dungeon_name (str): The name of the file to load the level from
+            compact (bool): If True, the entities are stored in a CompactGrid
+                rather than a dict, which uses far less memory on large levels
+            moves (int): The moves the player starts with, by default the
+                ones given to the level in GAME_LEVELS
+            chunked (bool): If True, the level file is memory-mapped and the
+                entities are stored in a ChunkedGrid which parses it in tiles
+                as they are needed, for levels too large to load at once
+            tile_size (int): The number of rows and columns of each tile
+                in chunked mode
+            max_tiles (int): The number of parsed tiles kept in chunked mode
+            dungeon (list<str>): The lines of the level, as returned by
+                load_game, which are used rather than reading dungeon_name
+        """
+        self._dungeon_name = dungeon_name
+        self._compact = compact
+        self._chunked = chunked
+        self._binary_name = None
+        self._binary_level = None
+        # the BinaryLevel under the entities, released by close
+        self._mapped_level = None
+        if dungeon is not None:
+            self._dungeon = dungeon
+            self._dungeon_size = len(dungeon)
+        elif is_binary_level(dungeon_name):
+            # binary levels are always stored in a CompactGrid over the file
+            from level_format import BinaryLevel
+            self._binary_name = dungeon_name
+            self._binary_level = BinaryLevel(dungeon_name)
+            self._compact = True
+            self._chunked = False
+            self._dungeon = None
+            self._dungeon_size = self._binary_level.get_rows()
+            if moves is None:
+                moves = self._binary_level.get_moves()
+        elif chunked:
+            from chunked_world import LevelFile, TILE_SIZE, MAX_TILES
+            self._level_file = LevelFile(dungeon_name)
+            self._tile_size = tile_size or TILE_SIZE
+            self._max_tiles = max_tiles or MAX_TILES
+            self._dungeon = None
+            self._dungeon_size = self._level_file.get_rows()
+        else:
+            self._dungeon = load_game(dungeon_name)
+            self._dungeon_size = len(self._dungeon)
+        if moves is None:
+            moves = GAME_LEVELS[dungeon_name]
+        self._player = Player(moves)
+        self._game_information = self.init_game_information()
+        # True while forks read the entities of this game as their base
+        self._shared_information = False
+        self._win = False
+        self._journal = None
+
+    def get_dungeon_name(self):
+        """Returns the name of the file the level was loaded from."""
+        return self._dungeon_name
+
+    def close(self):
+        """
+        Releases the file of a level loaded in chunked mode or the memory map
+        of a binary level; a game of a text level holds nothing to release.
+        Forks share the level, so neither the game nor any of its forks can
+        be played afterwards. Closing twice does nothing.
+        """
+        if self._chunked:
+            self._level_file.close()
+        if self._mapped_level is not None:
+            self._mapped_level.close()
+            self._mapped_level = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def to_state(self):
+        """
+        Describes the whole state of the game, including the level itself,
+        so that it can be saved as JSON and rebuilt with from_state.
+
+        Returns:
+            (dict): The state of the game
+
+        Raises:
+            ValueError: If the level was loaded from a binary level or in
+                chunked mode, whose lines are not kept in memory
+        """
+        self._check_describable()
+        # positions where the level differs from the level file
+        changes = []
+        index = self._index
+        for entity_id in sorted(index.get_ids()):
+            if entity_id == PLAYER:
+                continue
+            origins = set(index.get_origins(entity_id))
+            present = index.get_present(entity_id)
+            for position in sorted(origins - present):
+                if self.get_entity(position) is None:
+                    changes.append([position, None])
+            for position in sorted(present - origins):
+                changes.append([position, entity_state(self.get_entity(position))])
+
+        player = self._player
+        return {
+            "level": self._dungeon_name,
+            "dungeon": self._dungeon,
+            "compact": self._compact,
+            "position": player.get_position(),
+            "moves": player.moves_remaining(),
+            "inventory": [entity_state(item) for item in player.get_inventory()],
+            "won": self._win,
+            "changes": changes,
+            "journal": None if self._journal is None else self._journal.to_state(),
+            }
+
+    def _check_describable(self):
+        """Raises ValueError if to_state cannot describe the game, see to_state."""
+        if self._dungeon is None:
+            raise ValueError("only games of text levels not in chunked mode can be described")
+
+    def snapshot(self):
+        """
+        Returns a fork of the game with a copy of its journal, which stays as
+        it is while this game is played on, so that it can be described with
+        to_state later, for example on another thread.
+
+        Returns:
+            (GameLogic): The copy of the game
+
+        Raises:
+            ValueError: If to_state cannot describe the game
+        """
+        self._check_describable()
+        game = self.fork()
+        if self._journal is not None:
+            game._journal = self._journal.copy()
+        return game
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Rebuilds a game from the description returned by to_state, without
+        reading the level file.
+
+        Parameters:
+            state (dict): The state of the game
+
+        Returns:
+            (GameLogic): The game
+        """
+        game = cls(state["level"], state["compact"], state["moves"],
+                   dungeon=state["dungeon"])
+        for position, entity in state["changes"]:
+            position = tuple(position)
+            if entity is None:
+                game.remove_entity(position)
+            else:
+                game.add_entity(position, entity_from_state(entity))
+        player = game.get_player()
+        player.set_position(tuple(state["position"]))
+        for item in state["inventory"]:
+            player.add_item(entity_from_state(item))
+        game.set_win(state["won"])
+        if state["journal"] is not None:
+            game._journal = Journal.from_state(state["journal"])
+        return game
+
+    def get_positions(self, entity):
+        """
+        Returns the positions where the level places an entity.
+
+        Parameters:
+            entity (str): The id of the entity
+
+        Returns:
+            (list<tuple<int, int>>): The positions, in reading order
+        """
+        if entity == WALL and (self._compact or self._chunked):
+            return self._game_information.wall_positions()
+        return list(self._index.get_origins(entity))
+
+    def init_game_information(self):
+        """
+        Builds the entities of the level and the index of their positions,
+        and moves the player to its starting position.
+
+        Returns:
+            (dict<tuple<int, int>: Entity>): The entity at each position,
+                which is a CompactGrid in compact mode
+        """
+        if self._binary_name is not None:
+            return self._init_binary_information()
+        if self._chunked:
+            return self._init_chunked_information()
+        if self._compact:
+            return self._init_compact_information()
+
+        self._index = index = EntityIndex()
+        information = {}
+        for row, line in enumerate(self._dungeon):
+            for col, char in enumerate(line):
+                if char == SPACE:
+                    continue
+                position = (row, col)
+                index.add_origin(char, position)
+                if char == WALL:
+                    information[position] = WALL_ENTITY
+                    index.add(position, char)
+                    continue
+                entity_type = ENTITY_TYPES.get(char)
+                if entity_type is not None:
+                    information[position] = entity_type()
+                    index.add(position, char)
+
+        self._player.set_position(index.get_origins(PLAYER)[0])
+        return information
+
+    def _init_compact_information(self):
+        """
+        Builds a CompactGrid of the level. Walls are only stored in the grid,
+        the other entities are also recorded in the index.
+        """
+        self._index = index = EntityIndex()
+        columns = max([self._dungeon_size] + [len(line) for line in self._dungeon])
+        information = CompactGrid(self._dungeon_size, columns)
+        for row, line in enumerate(self._dungeon):
+            information.load_row(row, line)
+            for match in _NON_WALL_ENTITY.finditer(line):
+                char = match.group()
+                position = (row, match.start())
+                index.add_origin(char, position)
+                entity_type = ENTITY_TYPES.get(char)
+                if entity_type is not None:
+                    information[position] = entity_type()
+                    index.add(position, char)
+
+        self._player.set_position(index.get_origins(PLAYER)[0])
+        return information
+
+    def _init_binary_information(self):
+        """
+        Builds a CompactGrid over the arrays of a binary level. The level is
+        mapped again so that the grid starts from the level as saved.
+        """
+        from level_format import BinaryLevel
+        if self._binary_level is None:
+            self._binary_level = BinaryLevel(self._binary_name, verify=False)
+        level, self._binary_level = self._binary_level, None
+        self._mapped_level = level
+
+        self._index = index = EntityIndex()
+        information = CompactGrid(level.get_rows(), level.get_columns(),
+                                  level.get_cells(), level.get_blocked(),
+                                  level.get_walls())
+        for char, position in level.get_entities():
+            index.add_origin(char, position)
+            entity_type = ENTITY_TYPES.get(char)
+            if entity_type is not None:
+                information[position] = entity_type()
+                index.add(position, char)
+
+        self._player.set_position(index.get_origins(PLAYER)[0])
+        return information
+
+    def _init_chunked_information(self):
+        """
+        Builds a ChunkedGrid of the level. The other entities are found with
+        a single scan of the level file, which is remembered for restarts.
+        """
+        from chunked_world import ChunkedGrid
+        self._index = index = EntityIndex()
+        for char, position in self._level_file.get_entities():
+            index.add_origin(char, position)
+            if char in ENTITY_TYPES:
+                index.add(position, char)
+
+        self._player.set_position(index.get_origins(PLAYER)[0])
+        return ChunkedGrid(self._level_file, self._tile_size, self._max_tiles)
+
+    def is_compact(self):
+        """Returns True if the entities are stored in a CompactGrid."""
+        return self._compact
+
+    def is_chunked(self):
+        """Returns True if the entities are stored in a ChunkedGrid."""
+        return self._chunked
+
+    def get_index(self):
+        """Returns the EntityIndex of the level."""
+        return self._index
+
+    def is_present(self, entity):
+        """Returns True if at least one entity with the given id is still in the level."""
+        return self._index.is_present(entity)
+
+    def add_entity(self, position, entity):
+        """
+        Places entity at position, for example to restore an item which
+        was picked up.
+
+        Parameters:
+            position (tuple<int, int>): The (row, col) position
+            entity (Entity): The entity to place
+        """
+        self.remove_entity(position)
+        self._game_information[position] = entity
+        self._index.add(position, entity.get_id())
+
+    def _own_information(self):
+        """
+        Returns the entities of the game for changing them. Entities which
+        forks read as their base are left as they are, and the changes of
+        this game are kept in an OverlayGrid over them from then on.
+        """
+        if self._shared_information:
+            self._shared_information = False
+            self._game_information = OverlayGrid(self._game_information)
+        return self._game_information
+
+    def remove_entity(self, position):
+        """
+        Removes the entity at position from the level.
+
+        Parameters:
+            position (tuple<int, int>): The (row, col) position
+
+        Returns:
+            (Entity): The entity which was removed, or None
+        """
+        entity = self._own_information().pop(position, None)
+        if entity is not None:
+            self._index.remove(position, entity.get_id())
+        return entity
+
+    def get_player(self):
+        """ """
+        return self._player
+
+    def start_journal(self, max_entries=None):
+        """
+        Starts recording each move made with play_move so that it can be
+        undone and redone.
+
+        Parameters:
+            max_entries (int): The number of moves which can be undone, by
+                default there is no limit
+        """
+        self._journal = Journal(max_entries)
+
+    def fork(self):
+        """
+        Returns a new GameLogic in the same state which can be played
+        independently, for searching ahead. The level is shared rather than
+        copied: the fork stores its entities in an OverlayGrid over those of
+        this game, which are not changed in place afterwards, so a fork only
+        copies the player and the entities picked up or placed since. A fork
+        of a fork shares the same base, so the overlays are never stacked.
+        The fork has no journal.
+
+        Returns:
+            (GameLogic): The copy of the game
+        """
+        information = self._game_information
+        game = GameLogic.__new__(GameLogic)
+        game.__dict__.update(self.__dict__)
+        game._player = self._player.copy()
+        if isinstance(information, OverlayGrid):
+            game._game_information = information.copy()
+        else:
+            self._shared_information = True
+            game._game_information = OverlayGrid(information)
+        game._shared_information = False
+        game._index = self._index.fork()
+        game._journal = None
+        return game
+
+    def state_key(self):
+        """
+        Returns a hashable description of the state of the game, which is
+        equal for this game and its forks whenever they are in the same
+        state, for use in transposition tables.
+
+        Returns:
+            (tuple): The position of the player, the moves left, the ids of
+                the items held, whether the game is won and the changes to
+                the level
+        """
+        player = self._player
+        return (player.get_position(), player.moves_remaining(),
+                tuple(sorted(item.get_id() for item in player.get_inventory())),
+                self._win, self._index.get_changes())
+
+    def get_journal(self):
+        """Returns the Journal of the moves made, or None if it was not started."""
+        return self._journal
+
+    def play_move(self, direction, time=None):
+        """
+        Makes a move in the given direction, which costs a move even if the
+        player collides with something.
+
+        Parameters:
+            direction (str): a direction for the player to travel in
+            time: The time of the move, recorded in the journal if there is one
+
+        Returns:
+            (bool): True if the player changed position, otherwise False
+        """
+        player = self._player
+        journal = self._journal
+        if journal is None:
+            player.change_move_count(-1)
+            if self.collision_check(direction):
+                return False
+            self.move_player(direction)
+            entity = self.get_entity(player.get_position())
+            if entity is not None:
+                entity.on_hit(self)
+            return True
+
+        old_position = player.get_position()
+        moves = player.moves_remaining()
+        items = len(player.get_inventory())
+        won = self._win
+        removed = None
+        player.change_move_count(-1)
+        moved = not self.collision_check(direction)
+        if moved:
+            self.move_player(direction)
+            new_position = player.get_position()
+            entity = self.get_entity(new_position)
+            if entity is not None:
+                entity.on_hit(self)
+                if self.get_entity(new_position) is not entity:
+                    removed = entity
+        journal.record(JournalEntry(old_position, player.get_position(),
+                                    player.moves_remaining() - moves,
+                                    player.get_inventory()[items:], removed,
+                                    won, self._win, time))
+        return moved
+
+    def can_undo(self):
+        """Returns True if there is a recorded move to undo."""
+        return self._journal is not None and self._journal.can_undo()
+
+    def can_redo(self):
+        """Returns True if there is an undone move to redo."""
+        return self._journal is not None and self._journal.can_redo()
+
+    def undo(self):
+        """
+        Undoes the most recent move.
+
+        Returns:
+            (JournalEntry): The move which was undone, or None if there is none
+        """
+        if not self.can_undo():
+            return None
+        entry = self._journal.pop_undo()
+        entry.undo(self)
+        return entry
+
+    def redo(self):
+        """
+        Makes the most recently undone move again.
+
+        Returns:
+            (JournalEntry): The move which was redone, or None if there is none
+        """
+        if not self.can_redo():
+            return None
+        entry = self._journal.pop_redo()
+        entry.redo(self)
+        return entry
+
+    def get_entity(self, position):
+        """ """
+        return self._game_information.get(position)
+
+    def get_entity_in_direction(self, direction):
+        """ """
+        new_position = self.new_position(direction)
+        return self.get_entity(new_position)
+
+    def get_game_information(self):
+        """ """
+        return self._game_information
+
+    def get_dungeon_size(self):
+        """ """
+        return self._dungeon_size
+
+    def move_player(self, direction):
+        """ """
+        new_pos = self.new_position(direction)
+        self.get_player().set_position(new_pos)
+
+    def collision_check(self, direction):
+        """
+        Check to see if a player can travel in a given direction
+        Parameters:
+            direction (str): a direction for the player to travel in.
+
+        Returns:
+            (bool): False if the player can travel in that direction without colliding otherwise True.
+        """
+        if self._compact or self._chunked:
+            row, col = self._player.get_position()
+            dx, dy = DIRECTIONS[direction]
+            row += dx
+            col += dy
+            if not (0 <= row < self._dungeon_size and 0 <= col < self._dungeon_size):
+                return True
+            return self._game_information.is_blocked(row, col)
+
+        new_pos = self.new_position(direction)
+        entity = self.get_entity(new_pos)
+        if entity is not None and not entity.can_collide():
+            return True
+
+        return not (0 <= new_pos[0] < self._dungeon_size and 0 <= new_pos[1] < self._dungeon_size)
+
+    def new_position(self, direction):
+        """ """
+        x, y = self.get_player().get_position()
+        dx, dy = DIRECTIONS[direction]
+        return x + dx, y + dy
+
+    def check_game_over(self):
+        """ """
+        return self.get_player().moves_remaining() <= 0
+
+    def set_win(self, win):
+        """ """
+        self._win = win
+
+    def won(self):
+        """ """
+        return self._win
@@ -0,0 +1,169 @@
+"""
+Generates large levels for the Key Cave Adventure Game which can always be won.
+
+A level is a field of random walls and move increases with a winding
+corridor carved through it. The corridor goes down one row at a time from
+the player, past the key, to the door, so the moves needed to walk it are
+known before a single row is written and become the move budget of the
+level. Rows are generated and written one at a time as bytes, so even a
+5000 x 5000 level never has to be held in memory.
+
+Usage:
+    python generator.py 500 --seed 42 --output levels/big.txt
+"""
+
+import argparse
+import random
+import sys
+
+from game_logic import PLAYER, KEY, DOOR, WALL, MOVE_INCREASE, SPACE
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+MIN_SIZE = 5
+
+class LevelGenerator:
+    """Generates a seeded level which can be won within its move budget."""
+    def __init__(self, size, seed=0, wall_density=0.3, move_increase_density=0.01,
+                 wander=None):
+        """
+        Constructor of LevelGenerator. The same arguments always give the
+        same level.
+
+        Parameters:
+            size (int): The number of rows and columns of the level
+            seed (int): The seed of the random numbers
+            wall_density (float): The fraction of cells outside the corridor
+                which are walls
+            move_increase_density (float): The fraction of cells outside the
+                corridor which are move increases
+            wander (int): How many columns the corridor may move sideways on
+                each row, by default a tenth of the size
+        """
+        if size < MIN_SIZE:
+            raise ValueError(f"levels must be at least {MIN_SIZE} x {MIN_SIZE}")
+        if wall_density + move_increase_density > 1:
+            raise ValueError("wall_density and move_increase_density add up to more than 1")
+        self._size = size
+        self._seed = seed
+
+        # random bytes below walls are walls, below move_increases are move increases
+        walls = round(wall_density * 256)
+        move_increases = walls + round(move_increase_density * 256)
+        self._cells = bytes(ord(WALL) if byte < walls
+                            else ord(MOVE_INCREASE) if byte < move_increases
+                            else ord(SPACE)
+                            for byte in range(256))
+
+        # the corridor enters row r at column _columns[r - 1] and leaves it
+        # downwards at column _columns[r], for each row r inside the border
+        generator = random.Random(seed)
+        wander = max(1, size // 10) if wander is None else wander
+        self._columns = [generator.randint(1, size - 2)]
+        for _ in range(size - 2):
+            column = self._columns[-1] + generator.randint(-wander, wander)
+            self._columns.append(min(max(column, 1), size - 2))
+        self._key_row = size // 2
+        # the cells are drawn from here on, afresh by each call of rows
+        self._cells_state = generator.getstate()
+
+    def get_size(self):
+        """Returns the number of rows and columns of the level."""
+        return self._size
+
+    def get_budget(self, slack=0):
+        """
+        Returns the moves needed to walk the corridor from the player to the
+        door, which is enough to win the level.
+
+        Parameters:
+            slack (int): Extra moves to add to the budget
+        """
+        sideways = sum(abs(after - before)
+                       for before, after in zip(self._columns, self._columns[1:]))
+        return sideways + self._size - 3 + slack
+
+    def rows(self):
+        """
+        Generates the level one row at a time.
+
+        Yields:
+            (bytes): Each row of the level, without a line ending
+        """
+        size = self._size
+        generator = random.Random()
+        generator.setstate(self._cells_state)
+        border = WALL.encode() * size
+        yield border
+        for row in range(1, size - 1):
+            cells = bytearray(generator.randbytes(size).translate(self._cells))
+            cells[0] = cells[-1] = ord(WALL)
+            entry, leave = self._columns[row - 1], self._columns[row]
+            start, end = min(entry, leave), max(entry, leave)
+            cells[start:end + 1] = SPACE.encode() * (end - start + 1)
+
+            if row == 1:
+                cells[entry] = ord(PLAYER)
+            if row == self._key_row:
+                cells[leave] = ord(KEY)
+            if row == size - 2:
+                cells[leave] = ord(DOOR)
+            yield bytes(cells)
+        yield border
+
+    def write(self, filename):
+        """
+        Writes the level to filename in the format read by load_game.
+
+        Parameters:
+            filename (str): The file to write the level to
+        """
+        with open(filename, "wb") as file:
+            for row in self.rows():
+                file.write(row)
+                file.write(b"\n")
+
+def generate_level(filename, size, seed=0, slack=0, **kwargs):
+    """
+    Writes a new level to filename.
+
+    Parameters:
+        filename (str): The file to write the level to
+        size (int): The number of rows and columns of the level
+        seed (int): The seed of the random numbers
+        slack (int): Extra moves to add to the budget
+        **kwargs: Optional arguments of LevelGenerator
+
+    Returns:
+        (int): The move budget of the level
+    """
+    generator = LevelGenerator(size, seed, **kwargs)
+    generator.write(filename)
+    return generator.get_budget(slack)
+
+def main(argv=None):
+    """Generates levels from the command line, printing each file with its budget."""
+    parser = argparse.ArgumentParser(description="Generate Key Cave Adventure levels.")
+    parser.add_argument("size", type=int, help="number of rows and columns")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first level")
+    parser.add_argument("-n", "--count", type=int, default=1,
+                        help="number of levels, using consecutive seeds")
+    parser.add_argument("-o", "--output", default="level_{seed}.txt",
+                        help="file name, where {seed} is replaced by the seed")
+    parser.add_argument("--walls", type=float, default=0.3, help="wall density")
+    parser.add_argument("--move-increases", type=float, default=0.01,
+                        help="move increase density")
+    parser.add_argument("--slack", type=int, default=0, help="extra moves in the budget")
+    args = parser.parse_args(argv)
+
+    for seed in range(args.seed, args.seed + args.count):
+        filename = args.output.format(seed=seed)
+        budget = generate_level(filename, args.size, seed, args.slack,
+                                wall_density=args.walls,
+                                move_increase_density=args.move_increases)
+        print(f"{filename} {budget}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
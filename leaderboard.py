@@ -0,0 +1,217 @@
+"""
+The high scores of the Key Cave Adventure Game, kept per level in SQLite.
+
+Scores are the seconds taken to win a level, so lower is better, and ties
+go to whoever got there first. Every score is a row of a single table
+indexed by level and score, so the best scores of a level are read straight
+from the index. Triggers keep the number of scores of each level per score
+and per range of BUCKET_SIZE scores, so a rank adds up at most a few
+thousand counts, however many scores there are. The database is in WAL
+mode, so several games can add scores at once while others read them.
+
+A Leaderboard must be used from the thread which created it. A GUI should
+use an AsyncLeaderboard, which runs the queries on a background thread and
+hands their results back when polled, so that it never waits on the disk.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+DATABASE = "high_scores.db"
+# milliseconds to wait for another process to finish writing
+BUSY_TIMEOUT = 5000
+# the number of consecutive scores counted together, a power of two
+BUCKET_SIZE = 1024
+_BUCKET_BITS = BUCKET_SIZE.bit_length() - 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    level TEXT NOT NULL,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_level ON scores (level, score, id);
+CREATE TABLE IF NOT EXISTS score_counts (
+    level TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (level, score)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS bucket_counts (
+    level TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (level, bucket)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS count_score AFTER INSERT ON scores BEGIN
+    INSERT INTO score_counts VALUES (NEW.level, NEW.score, 1)
+        ON CONFLICT (level, score) DO UPDATE SET count = count + 1;
+    INSERT INTO bucket_counts VALUES (NEW.level, NEW.score >> {bits}, 1)
+        ON CONFLICT (level, bucket) DO UPDATE SET count = count + 1;
+END;
+"""
+
+class Leaderboard:
+    """The high scores of every level, stored in a SQLite database."""
+    def __init__(self, filename=DATABASE):
+        """
+        Constructor of Leaderboard, which creates the database if needed.
+
+        Parameters:
+            filename (str): The database file
+        """
+        self._connection = sqlite3.connect(filename, timeout=BUSY_TIMEOUT / 1000)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.executescript(_SCHEMA.format(bits=_BUCKET_BITS))
+
+    def add(self, level, name, score):
+        """
+        Records a score.
+
+        Parameters:
+            level (str): The level which was won
+            name (str): The name of the player
+            score (int): The seconds taken to win
+
+        Returns:
+            (int): The rank of the new score, 1 for the best
+        """
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO scores (level, name, score, recorded) VALUES (?, ?, ?, ?)",
+                (level, name, score, time.time()))
+            # the new score comes after the others which are just as good
+            return int(self._count_up_to(level, score))
+
+    def add_many(self, level, scores):
+        """
+        Records many scores of a level in a single transaction.
+
+        Parameters:
+            level (str): The level which was won
+            scores (iterable<tuple<str, int>>): The name and score of each win
+        """
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO scores (level, name, score, recorded) VALUES (?, ?, ?, ?)",
+                ((level, name, score, now) for name, score in scores))
+
+    def top(self, level, count=3):
+        """
+        Returns the best scores of a level.
+
+        Parameters:
+            level (str): The level
+            count (int): The number of scores to return
+
+        Returns:
+            (list<tuple<str, int>>): The name and score of each, best first
+        """
+        return self._connection.execute(
+            "SELECT name, score FROM scores WHERE level = ? ORDER BY score, id LIMIT ?",
+            (level, count)).fetchall()
+
+    def rank(self, level, score):
+        """
+        Returns the rank a new score would have on a level.
+
+        Parameters:
+            level (str): The level
+            score (int): The seconds taken to win
+
+        Returns:
+            (int): 1 if it would be the best, otherwise one more than the
+                number of scores at least as good
+        """
+        return int(self._count_up_to(level, score)) + 1
+
+    def _count_up_to(self, level, score):
+        """Returns the number of scores of a level which are at most score."""
+        bucket = score >> _BUCKET_BITS
+        return self._connection.execute(
+            "SELECT (SELECT TOTAL(count) FROM bucket_counts WHERE level = ? AND bucket < ?)"
+            " + (SELECT TOTAL(count) FROM score_counts WHERE level = ? AND score >= ? AND score <= ?)",
+            (level, bucket, level, bucket << _BUCKET_BITS, score)).fetchone()[0]
+
+    def count(self, level):
+        """Returns the number of scores recorded for a level."""
+        return int(self._connection.execute(
+            "SELECT TOTAL(count) FROM bucket_counts WHERE level = ?", (level,)).fetchone()[0])
+
+    def get_levels(self):
+        """Returns the levels which have scores, in alphabetical order."""
+        return [level for level, in self._connection.execute(
+            "SELECT DISTINCT level FROM scores ORDER BY level")]
+
+    def close(self):
+        """Closes the database."""
+        self._connection.close()
+
+class AsyncLeaderboard:
+    """
+    A Leaderboard used from a background thread. Requests return at once,
+    and each callback is called with the result by poll, on the thread
+    which calls poll.
+    """
+    def __init__(self, filename=DATABASE):
+        """
+        Constructor of AsyncLeaderboard, which starts its thread.
+
+        Parameters:
+            filename (str): The database file
+        """
+        self._filename = filename
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Answers requests until None is received."""
+        leaderboard = Leaderboard(self._filename)
+        try:
+            for method, arguments, callback in iter(self._requests.get, None):
+                try:
+                    result = getattr(leaderboard, method)(*arguments)
+                except sqlite3.Error as error:
+                    result = error
+                if callback is not None:
+                    self._results.put((callback, result))
+        finally:
+            leaderboard.close()
+
+    def request(self, method, *arguments, callback=None):
+        """
+        Asks for a method of Leaderboard to be called in the background.
+
+        Parameters:
+            method (str): The name of the method, such as "add" or "top"
+            *arguments: The arguments of the method
+            callback (callable): Called by poll with the result, which is a
+                sqlite3.Error if the query failed
+        """
+        self._requests.put((method, arguments, callback))
+
+    def poll(self):
+        """Calls the callbacks of the requests which have finished."""
+        while True:
+            try:
+                callback, result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            callback(result)
+
+    def close(self):
+        """Stops the thread once the requests made so far are done."""
+        self._requests.put(None)
+        self._thread.join()
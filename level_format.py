@@ -0,0 +1,201 @@
+"""
+A compact binary format for levels of the Key Cave Adventure Game.
+
+A binary level holds everything GameLogic builds when it loads a text level,
+so loading one needs no parsing at all:
+
+    header    magic, version, rows, columns, move budget, number of walls,
+              number of entities and a CRC-32 of everything after it
+    cells     one cell code per cell (EMPTY_CELL, WALL_CELL or ENTITY_CELL)
+    blocked   1 for each cell which cannot be entered, otherwise 0
+    entities  the character, row and column of every cell which is neither
+              a wall nor empty, in reading order
+
+The file is memory-mapped copy-on-write and the cell arrays are used in
+place, so only the pages changed during a game are ever copied.
+
+Usage:
+    python level_format.py game1.txt game2.txt
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+
+from game_logic import (GAME_LEVELS, WALL, SPACE, ENTITY_TYPES, EMPTY_CELL,
+                        WALL_CELL, ENTITY_CELL, BINARY_MAGIC)
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+MAGIC = BINARY_MAGIC
+VERSION = 1
+EXTENSION = ".kcl"
+
+# magic, version, flags, rows, columns, moves, walls, entities, checksum
+HEADER = struct.Struct("<4sHHIIIQQI")
+# character, row, column
+ENTITY = struct.Struct("<cII")
+
+# Translates the bytes of a text row into cell codes and into blocked cells
+_CELL_CODES = bytes(WALL_CELL if chr(byte) == WALL
+                    else ENTITY_CELL if chr(byte) in ENTITY_TYPES
+                    else EMPTY_CELL
+                    for byte in range(256))
+_BLOCKED_CODES = bytes(1 if chr(byte) == WALL else 0 for byte in range(256))
+_NON_WALL_ENTITY = re.compile(f"[^{re.escape(WALL)}{re.escape(SPACE)}]".encode())
+
+class BinaryLevel:
+    """A binary level mapped into memory."""
+    def __init__(self, filename, verify=True):
+        """
+        Constructor of BinaryLevel.
+
+        Parameters:
+            filename (str): The binary level file
+            verify (bool): If True, the checksum is verified
+
+        Raises:
+            ValueError: If the file is not a binary level of a supported
+                version, or its checksum does not match
+        """
+        with open(filename, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{filename} is not a binary level")
+        (magic, version, _, self._rows, self._cols, self._moves, self._walls,
+         entities, checksum) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a binary level")
+        if version != VERSION:
+            raise ValueError(f"{filename} has unsupported version {version}")
+
+        cells = self._rows * self._cols
+        self._view = view = memoryview(self._map)
+        self._cells = view[HEADER.size:HEADER.size + cells]
+        self._blocked = view[HEADER.size + cells:HEADER.size + 2 * cells]
+        entities_start = HEADER.size + 2 * cells
+        self._entities = view[entities_start:entities_start + entities * ENTITY.size]
+        if len(self._entities) != entities * ENTITY.size:
+            raise ValueError(f"{filename} is truncated")
+        if verify and zlib.crc32(view[HEADER.size:]) != checksum:
+            raise ValueError(f"{filename} is corrupted, its checksum does not match")
+
+    def get_rows(self):
+        """Returns the number of rows in the level."""
+        return self._rows
+
+    def get_columns(self):
+        """Returns the number of columns, which is the stride of each row in the arrays."""
+        return self._cols
+
+    def get_moves(self):
+        """Returns the move budget of the level, or None if it has none."""
+        return self._moves or None
+
+    def get_walls(self):
+        """Returns the number of walls in the level."""
+        return self._walls
+
+    def get_cells(self):
+        """Returns a writable view of the cell codes, backed by the file."""
+        return self._cells
+
+    def get_blocked(self):
+        """Returns a writable view of the blocked cells, backed by the file."""
+        return self._blocked
+
+    def get_entities(self):
+        """
+        Yields:
+            (tuple<str, tuple<int, int>>): The character and (row, col)
+                position of each cell which is neither a wall nor empty
+        """
+        for char, row, col in ENTITY.iter_unpack(self._entities):
+            yield char.decode("latin-1"), (row, col)
+
+    def close(self):
+        """
+        Releases the memory map. The views returned by get_cells and
+        get_blocked can no longer be used. Closing twice does nothing.
+        """
+        for view in (self._cells, self._blocked, self._entities, self._view):
+            view.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def convert(text_filename, binary_filename, moves=None):
+    """
+    Converts a text level, as read by load_game, into a binary level. The
+    text level is read one line at a time.
+
+    Parameters:
+        text_filename (str): The text level file
+        binary_filename (str): The binary level file to write
+        moves (int): The move budget, by default the one in GAME_LEVELS,
+            if any
+    """
+    if moves is None:
+        moves = GAME_LEVELS.get(os.path.basename(text_filename), 0)
+
+    rows = cols = 0
+    with open(text_filename, "r") as file:
+        for line in file:
+            rows += 1
+            cols = max(cols, len(line.strip('\n')))
+    cols = max(rows, cols)
+
+    walls = 0
+    entities = []
+    blocked = bytearray()
+    with open(text_filename, "r") as text, open(binary_filename, "w+b") as binary:
+        binary.write(bytes(HEADER.size))
+        for row, line in enumerate(text):
+            cells = line.strip('\n').encode("latin-1", "replace").ljust(cols, SPACE.encode())
+            codes = cells.translate(_CELL_CODES)
+            binary.write(codes)
+            blocked += cells.translate(_BLOCKED_CODES)
+            walls += codes.count(WALL_CELL)
+            for match in _NON_WALL_ENTITY.finditer(cells):
+                entities.append(ENTITY.pack(match.group(), row, match.start()))
+        binary.write(blocked)
+        for entity in entities:
+            binary.write(entity)
+
+        binary.seek(HEADER.size)
+        checksum = 0
+        for chunk in iter(lambda: binary.read(1 << 20), b""):
+            checksum = zlib.crc32(chunk, checksum)
+        binary.seek(0)
+        binary.write(HEADER.pack(MAGIC, VERSION, 0, rows, cols, moves, walls,
+                                 len(entities), checksum))
+
+def main(argv=None):
+    """Converts text levels given on the command line into binary levels."""
+    parser = argparse.ArgumentParser(description="Convert text levels into binary levels.")
+    parser.add_argument("levels", nargs="+", help="text level files")
+    parser.add_argument("-o", "--output",
+                        help=f"output file, by default the level with a {EXTENSION} extension")
+    parser.add_argument("-m", "--moves", type=int, default=None,
+                        help="move budget, by default the one in GAME_LEVELS")
+    args = parser.parse_args(argv)
+    if args.output and len(args.levels) > 1:
+        parser.error("--output can only be used with a single level")
+
+    for level in args.levels:
+        output = args.output or os.path.splitext(level)[0] + EXTENSION
+        convert(level, output, args.moves)
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
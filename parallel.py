@@ -0,0 +1,42 @@
+"""
+Spreads independent tasks over a pool of processes.
+
+The command line tools (validator, replay and evaluate) all run a module
+level function over a list of tasks; imap_tasks runs them in this process
+when a pool would not help, so small runs start no processes at all.
+"""
+
+import multiprocessing
+import os
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+def imap_tasks(function, tasks, workers=None, initializer=None, initargs=()):
+    """
+    Runs a function on each task over a pool of processes, or in this
+    process when there is one worker or fewer than two tasks.
+
+    Parameters:
+        function (callable): A module level function taking one task
+        tasks (list): The tasks
+        workers (int): The number of processes, by default one per core
+        initializer (callable): Called with initargs in each process first
+        initargs (tuple): The arguments of initializer
+
+    Yields:
+        The result of each task, in the order they finish
+    """
+    if workers == 1 or len(tasks) < 2:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield function(task)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    # large chunks keep the cost of sending small tasks between processes low
+    chunksize = max(1, min(256, len(tasks) // (workers * 4)))
+    with multiprocessing.Pool(workers, initializer, initargs) as pool:
+        yield from pool.imap_unordered(function, tasks, chunksize)
+
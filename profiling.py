@@ -0,0 +1,210 @@
+"""
+Optional timing of the functions of the Key Cave Adventure Game.
+
+A Profiler replaces chosen methods with wrappers which time each call into
+a LatencyHistogram, and puts the original methods back when it is turned
+off, so the game runs exactly as fast as before unless it is profiling.
+The histograms can be exported as JSON, or as a dump which pstats and
+tools such as snakeviz read like one written by cProfile.
+
+Usage:
+    profiler = Profiler()
+    profiler.instrument(GameLogic, "collision_check")
+    ...
+    profiler.export("profile.json")
+    profiler.uninstrument()
+"""
+
+import functools
+import json
+import marshal
+import time
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+# each power of two of nanoseconds is split into this many buckets
+_SUB_BITS = 4
+_SUB_BUCKETS = 1 << _SUB_BITS
+
+class LatencyHistogram:
+    """
+    Counts the durations of calls in buckets about 6% wide, so that
+    percentiles can be estimated without keeping every duration.
+    """
+    def __init__(self):
+        """Constructor of LatencyHistogram."""
+        self.clear()
+
+    def clear(self):
+        """Forgets every duration recorded."""
+        self._buckets = {}
+        self._count = 0
+        self._total = 0
+        self._max = 0
+
+    def record(self, nanoseconds):
+        """Adds the duration of a call, in nanoseconds."""
+        self._count += 1
+        self._total += nanoseconds
+        if nanoseconds > self._max:
+            self._max = nanoseconds
+        bits = nanoseconds.bit_length()
+        if bits > _SUB_BITS:
+            bucket = bits << _SUB_BITS | (nanoseconds >> (bits - _SUB_BITS - 1)) & (_SUB_BUCKETS - 1)
+        else:
+            bucket = nanoseconds
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    def get_count(self):
+        """Returns the number of calls recorded."""
+        return self._count
+
+    def get_total(self):
+        """Returns the total duration of the calls, in nanoseconds."""
+        return self._total
+
+    @staticmethod
+    def _bucket_value(bucket):
+        """Returns the largest duration which falls in a bucket."""
+        if bucket < _SUB_BUCKETS:
+            # short durations have a bucket each
+            return bucket
+        shift = (bucket >> _SUB_BITS) - _SUB_BITS - 1
+        low = (_SUB_BUCKETS | bucket & (_SUB_BUCKETS - 1)) << shift
+        return low + (1 << shift) - 1
+
+    def percentile(self, fraction):
+        """
+        Estimates a percentile of the durations.
+
+        Parameters:
+            fraction (float): The percentile as a fraction, 0.5 for the median
+
+        Returns:
+            (int): The duration in nanoseconds, or 0 if nothing was recorded
+        """
+        if not self._count:
+            return 0
+        rank = max(1, round(fraction * self._count))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return min(self._bucket_value(bucket), self._max)
+        return self._max
+
+    def to_dict(self):
+        """Returns a summary of the histogram which can be saved as JSON, in milliseconds."""
+        return {
+            "count": self._count,
+            "total_ms": self._total / 1e6,
+            "mean_ms": self._total / self._count / 1e6 if self._count else 0,
+            "p50_ms": self.percentile(0.5) / 1e6,
+            "p90_ms": self.percentile(0.9) / 1e6,
+            "p99_ms": self.percentile(0.99) / 1e6,
+            "max_ms": self._max / 1e6,
+            }
+
+class Profiler:
+    """Times calls of instrumented methods, one LatencyHistogram per label."""
+    def __init__(self):
+        """Constructor of Profiler."""
+        self._histograms = {}
+        # label -> (filename, line, name) of the instrumented function
+        self._functions = {}
+        # (owner, name, original) of each method replaced
+        self._installed = []
+
+    def get_histogram(self, label):
+        """Returns the LatencyHistogram of a label, creating it if needed."""
+        histogram = self._histograms.get(label)
+        if histogram is None:
+            histogram = self._histograms[label] = LatencyHistogram()
+        return histogram
+
+    def get_labels(self):
+        """Returns the labels which have a histogram, in alphabetical order."""
+        return sorted(self._histograms)
+
+    def is_instrumenting(self):
+        """Returns True if any method is currently replaced."""
+        return bool(self._installed)
+
+    def instrument(self, owner, name, label=None):
+        """
+        Replaces a method of a class with one which times each call.
+
+        Parameters:
+            owner (type): The class which defines the method
+            name (str): The name of the method
+            label (str): The histogram to record into, by default
+                "Class.method"
+        """
+        original = owner.__dict__[name]
+        label = label or f"{owner.__name__}.{name}"
+        code = getattr(original, "__code__", None)
+        if code is not None:
+            self._functions[label] = (code.co_filename, code.co_firstlineno, label)
+        record = self.get_histogram(label).record
+        clock = time.perf_counter_ns
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                record(clock() - start)
+
+        setattr(owner, name, timed)
+        self._installed.append((owner, name, original))
+
+    def uninstrument(self):
+        """Puts back every original method, so that calls are no longer timed."""
+        for owner, name, original in reversed(self._installed):
+            setattr(owner, name, original)
+        self._installed.clear()
+
+    def reset(self):
+        """Forgets every duration recorded so far."""
+        for histogram in self._histograms.values():
+            histogram.clear()
+
+    def to_dict(self):
+        """Returns the summary of every histogram, by label."""
+        return {label: self._histograms[label].to_dict() for label in self.get_labels()}
+
+    def export(self, filename):
+        """
+        Writes the histograms to filename, as JSON unless the filename ends
+        with .prof or .pstats, in which case it is a cProfile style dump.
+
+        Parameters:
+            filename (str): The file to write
+        """
+        if filename.endswith((".prof", ".pstats")):
+            self.export_pstats(filename)
+            return
+        with open(filename, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def export_pstats(self, filename):
+        """
+        Writes the histograms to filename in the format written by
+        cProfile.Profile.dump_stats, which pstats.Stats can load. Each
+        label is a function whose own and cumulative time are the total
+        time of its calls.
+
+        Parameters:
+            filename (str): The file to write
+        """
+        stats = {}
+        for label in self.get_labels():
+            histogram = self._histograms[label]
+            function = self._functions.get(label, ("~", 0, label))
+            seconds = histogram.get_total() / 1e9
+            count = histogram.get_count()
+            stats[function] = (count, count, seconds, seconds, {})
+        with open(filename, "wb") as file:
+            marshal.dump(stats, file)
@@ -0,0 +1,343 @@
+"""
+Records the input of a game of the Key Cave Adventure Game and replays it.
+
+An input log starts with a header identifying the level by a hash of its
+file, followed by a stream of single byte tokens:
+
+    11dddddd  three directions, two bits each, the first in the high bits
+    10nndddd  one or two directions (nn), the first in the high bits
+    01tttttt  the time moves by t, a zigzag encoded number of seconds,
+              where t == 63 means the change follows as a varint
+    00000000  a life is used to undo the most recent move
+
+Directions take less than three bits each, and a log can be written and
+read one byte at a time, so runs can be replayed as they arrive. Replaying
+headless applies the moves with a GameEngine as fast as it can, which is
+enough to verify many submitted runs over all cores.
+
+Usage:
+    python replay.py runs/*.kcr --level game1.txt --level game2.txt -o results.jsonl
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import struct
+import sys
+
+from game_logic import GAME_LEVELS, GameLogic
+from engine import GameEngine, RUNNING, WON, LOST
+from parallel import imap_tasks
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+MAGIC = b"KCAR"
+VERSION = 1
+EXTENSION = ".kcr"
+USE_LIFE = "use_life"
+
+# magic, version, lives, moves, hash of the level file
+HEADER = struct.Struct("<4sHHI16s")
+
+_CODES = "WASD"
+_THREE = 0b11000000
+_SHORT = 0b10000000
+_TIME = 0b01000000
+_USE_LIFE = 0b00000000
+_LONG_TIME = 63
+
+def level_hash(filename):
+    """
+    Returns the hash identifying a level file in an input log.
+
+    Parameters:
+        filename (str): The level file
+
+    Returns:
+        (bytes): The first 16 bytes of the SHA-256 of the file
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()[:16]
+
+def _zigzag(number):
+    """Maps a signed number onto a natural number, small magnitudes first."""
+    return number * 2 if number >= 0 else -number * 2 - 1
+
+def _unzigzag(number):
+    """Reverses _zigzag."""
+    return number >> 1 if not number & 1 else -(number >> 1) - 1
+
+class InputRecorder:
+    """Writes the input of a game to an input log as it is played."""
+    def __init__(self, file, level, moves=None, lives=0):
+        """
+        Constructor of InputRecorder, which writes the header of the log.
+
+        Parameters:
+            file (file): A binary file to write the log to
+            level (str): The level file being played
+            moves (int): The moves the player starts with, by default the
+                ones in GAME_LEVELS
+            lives (int): The lives the player may use to undo moves
+        """
+        if moves is None:
+            moves = GAME_LEVELS.get(os.path.basename(level), 0)
+        self._file = file
+        self._time = 0
+        self._directions = []
+        file.write(HEADER.pack(MAGIC, VERSION, lives, moves, level_hash(level)))
+
+    def _set_time(self, time):
+        """Writes a change of time, if any."""
+        if time == self._time:
+            return
+        self._flush()
+        change = _zigzag(time - self._time)
+        self._time = time
+        if change < _LONG_TIME:
+            self._file.write(bytes([_TIME | change]))
+            return
+        token = bytearray([_TIME | _LONG_TIME])
+        change -= _LONG_TIME
+        while change >= 0x80:
+            token.append(change & 0x7f | 0x80)
+            change >>= 7
+        token.append(change)
+        self._file.write(token)
+
+    def _flush(self):
+        """Writes the directions which do not fill a whole token yet."""
+        directions = self._directions
+        if directions:
+            token = _SHORT | len(directions) << 4
+            for shift, code in zip((2, 0), directions):
+                token |= code << shift
+            self._file.write(bytes([token]))
+            directions.clear()
+
+    def record(self, direction, time=0):
+        """
+        Records a move.
+
+        Parameters:
+            direction (str): One of DIRECTIONS
+            time (int): The time of the move in seconds since the game started
+        """
+        self._set_time(time)
+        directions = self._directions
+        directions.append(_CODES.index(direction))
+        if len(directions) == 3:
+            first, second, third = directions
+            self._file.write(bytes([_THREE | first << 4 | second << 2 | third]))
+            directions.clear()
+
+    def use_life(self, time=0):
+        """
+        Records that a life was used to undo the most recent move.
+
+        Parameters:
+            time (int): The time in seconds since the game started
+        """
+        self._set_time(time)
+        self._flush()
+        self._file.write(bytes([_USE_LIFE]))
+
+    def close(self):
+        """Writes the remaining directions and flushes the file, which is left open."""
+        self._flush()
+        self._file.flush()
+
+def read_header(file):
+    """
+    Reads the header of an input log.
+
+    Parameters:
+        file (file): A binary file positioned at the start of the log
+
+    Returns:
+        (tuple<int, int, bytes>): The lives, the moves and the level hash
+
+    Raises:
+        ValueError: If the file is not an input log of a supported version
+    """
+    header = file.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise ValueError("not an input log")
+    magic, version, lives, moves, level = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("not an input log")
+    if version != VERSION:
+        raise ValueError(f"unsupported input log version {version}")
+    return lives, moves, level
+
+def read_events(file):
+    """
+    Reads the events of an input log after its header, as they arrive.
+
+    Parameters:
+        file (file): A binary file positioned after the header
+
+    Yields:
+        (tuple<int, str>): The time in seconds and either a direction or
+            USE_LIFE, in the order they were recorded
+    """
+    time = 0
+    tokens = iter(lambda: file.read(1 << 16), b"")
+    for chunk in tokens:
+        position = 0
+        while position < len(chunk):
+            token = chunk[position]
+            position += 1
+            kind = token & 0b11000000
+            if kind == _THREE:
+                yield time, _CODES[token >> 4 & 3]
+                yield time, _CODES[token >> 2 & 3]
+                yield time, _CODES[token & 3]
+            elif kind == _SHORT:
+                count = token >> 4 & 3
+                yield time, _CODES[token >> 2 & 3]
+                if count == 2:
+                    yield time, _CODES[token & 3]
+            elif kind == _TIME:
+                change = token & _LONG_TIME
+                if change == _LONG_TIME:
+                    shift = 0
+                    while True:
+                        if position == len(chunk):
+                            chunk = next(tokens, b"")
+                            position = 0
+                            if not chunk:
+                                raise ValueError("the input log is truncated")
+                        byte = chunk[position]
+                        position += 1
+                        change += (byte & 0x7f) << shift
+                        shift += 7
+                        if not byte & 0x80:
+                            break
+                time += _unzigzag(change)
+            else:
+                yield time, USE_LIFE
+
+def replay(log, level):
+    """
+    Replays an input log headless as fast as possible, applying the events
+    exactly as GameApp does until the game is won.
+
+    Parameters:
+        log (str): The input log file
+        level (str): The level file the log was recorded on
+
+    Returns:
+        (dict): The report of the run: the log, its level, the status of the
+            game, the score (the time it was won at), the moves left and the
+            number of moves and lives used
+
+    Raises:
+        ValueError: If the log is invalid or was recorded on another level
+    """
+    with open(log, "rb") as file:
+        lives, moves, expected = read_header(file)
+        if level_hash(level) != expected:
+            raise ValueError(f"{log} was not recorded on {level}")
+        game = GameLogic(level, compact=True, moves=moves)
+        if lives:
+            game.start_journal()
+        engine = GameEngine(game)
+        step = engine.step
+        lives_used = 0
+        score = None
+        for time, event in read_events(file):
+            if event is USE_LIFE:
+                if lives_used < lives and game.can_undo():
+                    game.undo()
+                    lives_used += 1
+                continue
+            step(event)
+            if game.won():
+                score = time
+                break
+
+    return {
+        "log": log,
+        "level": level,
+        "status": WON if game.won() else LOST if game.check_game_over() else RUNNING,
+        "score": score,
+        "moves": game.get_player().moves_remaining(),
+        "steps": engine.get_steps(),
+        "lives_used": lives_used,
+        }
+
+def _replay(arguments):
+    """Replays a log for Pool.imap_unordered, reporting errors instead of raising them."""
+    log, levels = arguments
+    try:
+        with open(log, "rb") as file:
+            _, _, expected = read_header(file)
+        level = levels.get(expected)
+        if level is None:
+            raise ValueError(f"{log} was recorded on an unknown level")
+        return replay(log, level)
+    except (OSError, ValueError) as error:
+        return {"log": log, "error": str(error)}
+
+def replay_logs(logs, levels, workers=None):
+    """
+    Replays many input logs over a pool of processes.
+
+    Parameters:
+        logs (list<str>): The input log files
+        levels (list<str>): The level files the logs may have been recorded on
+        workers (int): The number of processes, by default one per core
+
+    Yields:
+        (dict): The report of each log, in the order they finish, which
+            has an "error" instead if the log could not be replayed
+    """
+    hashes = {level_hash(level): level for level in levels}
+    tasks = [(log, hashes) for log in logs]
+    return imap_tasks(_replay, tasks, workers)
+
+def main(argv=None):
+    """
+    Replays the input logs given on the command line and writes one JSON
+    object per log, followed by a summary on stderr.
+
+    Returns:
+        (int): 0 if every log could be replayed, otherwise 1
+    """
+    parser = argparse.ArgumentParser(description="Replay Key Cave Adventure input logs.")
+    parser.add_argument("logs", nargs="+", help="input log files or glob patterns")
+    parser.add_argument("-l", "--level", action="append", default=None,
+                        help="level the logs may be recorded on (default: the levels in GAME_LEVELS)")
+    parser.add_argument("-o", "--output", help="write the reports to this file")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    logs = []
+    for pattern in args.logs:
+        logs.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+    levels = args.level or [level for level in GAME_LEVELS if os.path.exists(level)]
+    output = open(args.output, "w") if args.output else sys.stdout
+    total = failed = 0
+    try:
+        for report in replay_logs(logs, levels, args.workers):
+            total += 1
+            if "error" in report:
+                failed += 1
+            output.write(json.dumps(report) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"{total} logs, {failed} could not be replayed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
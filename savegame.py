@@ -0,0 +1,227 @@
+"""
+Saved games of the Key Cave Adventure Game.
+
+A saved game is a JSON document holding the whole state of a GameLogic (the
+level, the player, the entities picked up or placed and the journal of
+moves), along with the state of the GameApp around it, such as the lives
+and the time. Loading it rebuilds the game from the document alone, without
+reading the level file. Each document has a version, and files are replaced
+atomically so a crash while saving never leaves half a save behind. Saved
+games from before the documents, lines of numbers now called version 0,
+are still loaded by rebuilding them on LEGACY_LEVEL.
+
+An Autosaver describes and writes the most recent snapshot of a game given
+to it on a background thread, so that saving never holds up the game.
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+from game_logic import KEY, MOVE_INCREASE, GameLogic
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+FORMAT = "key-cave-adventure-save"
+VERSION = 1
+EXTENSION = ".json"
+# the level every version 0 saved game was of
+LEGACY_LEVEL = "game2.txt"
+
+def to_document(game, **extra):
+    """
+    Describes a game as a saved game document.
+
+    Parameters:
+        game (GameLogic): The game to save
+        **extra: Other values to save with it, which must be JSON serialisable
+
+    Returns:
+        (dict): The document
+    """
+    return {"format": FORMAT, "version": VERSION, "game": game.to_state(), "extra": extra}
+
+def from_document(document):
+    """
+    Rebuilds a game from a saved game document.
+
+    Parameters:
+        document (dict): The document returned by to_document
+
+    Returns:
+        (tuple<GameLogic, dict>): The game and the other values saved with it
+
+    Raises:
+        ValueError: If the document is not a saved game of a supported version
+    """
+    if not isinstance(document, dict) or document.get("format") != FORMAT:
+        raise ValueError("not a saved game")
+    if document.get("version") != VERSION:
+        raise ValueError(f"unsupported saved game version {document.get('version')}")
+    try:
+        return GameLogic.from_state(document["game"]), document["extra"]
+    except (KeyError, TypeError, IndexError) as error:
+        raise ValueError(f"the saved game is damaged: {error!r}")
+
+def from_legacy(lines, dungeon_name=LEGACY_LEVEL):
+    """
+    Rebuilds a game from a saved game of version 0, which has one number on
+    each line: the task, the row and column of the player, 1 if the move
+    increase and 1 if the key were picked up (otherwise 0), the time, the
+    moves left and, in the MASTERS task only, the lives.
+
+    Parameters:
+        lines (list<str>): The lines of the saved game
+        dungeon_name (str): The level the game was saved from
+
+    Returns:
+        (tuple<GameLogic, dict>): The game and the task, time and lives
+            saved with it, as from_document returns them
+
+    Raises:
+        OSError: If the level cannot be read
+        ValueError: If the lines are not a saved game of version 0
+    """
+    try:
+        values = [int(line) for line in lines]
+    except ValueError:
+        raise ValueError("not a saved game")
+    if len(values) not in (7, 8):
+        raise ValueError("not a saved game")
+    task, row, col, move_increase_taken, key_taken, time, moves = values[:7]
+
+    game = GameLogic(dungeon_name, moves=moves)
+    try:
+        if move_increase_taken:
+            game.remove_entity(game.get_positions(MOVE_INCREASE)[0])
+        if key_taken:
+            position = game.get_positions(KEY)[0]
+            game.get_player().add_item(game.get_entity(position))
+            game.remove_entity(position)
+    except IndexError:
+        raise ValueError(f"the saved game is not of {dungeon_name}")
+    game.get_player().set_position((row, col))
+    extra = {"task": task, "time": time}
+    if len(values) == 8:
+        extra["lives"] = values[7]
+    return game, extra
+
+def write_document(filename, document):
+    """
+    Writes a document to filename, replacing the file atomically.
+
+    Parameters:
+        filename (str): The file to write
+        document (dict): The document
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(document, file, separators=(",", ":"))
+        os.replace(temporary, filename)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+def save(filename, game, **extra):
+    """
+    Saves a game to filename.
+
+    Parameters:
+        filename (str): The file to write
+        game (GameLogic): The game to save
+        **extra: Other values to save with it, which must be JSON serialisable
+    """
+    write_document(filename, to_document(game, **extra))
+
+def load(filename):
+    """
+    Loads a saved game.
+
+    Parameters:
+        filename (str): The saved game file
+
+    Returns:
+        (tuple<GameLogic, dict>): The game and the other values saved with it
+
+    Raises:
+        OSError: If the file, or the level of a version 0 saved game, cannot
+            be read
+        ValueError: If the file is not a saved game of a supported version
+    """
+    with open(filename, "r") as file:
+        text = file.read()
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError as error:
+        lines = text.splitlines()
+        if len(lines) > 1:
+            # several numbers, one on each line, are not JSON
+            return from_legacy(lines)
+        raise ValueError(f"not a saved game: {error}")
+    return from_document(document)
+
+class Autosaver:
+    """
+    Saves games on a background thread, where they are described and
+    encoded as well as written. Only the most recent game is kept, so one
+    which is submitted while another is being saved replaces any still
+    waiting.
+    """
+    def __init__(self, filename):
+        """
+        Constructor of Autosaver, which starts its thread.
+
+        Parameters:
+            filename (str): The file to save to
+        """
+        self._filename = filename
+        # (game, extra) waiting to be saved
+        self._pending = None
+        self._closed = False
+        self._error = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Saves each submitted game until closed."""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                pending, self._pending = self._pending, None
+                if pending is None:
+                    return
+            game, extra = pending
+            try:
+                write_document(self._filename, to_document(game, **extra))
+            except (OSError, ValueError) as error:
+                self._error = error
+
+    def submit(self, game, **extra):
+        """
+        Asks for a game to be saved. The game must not be played afterwards,
+        so it should be a snapshot, as returned by GameLogic.snapshot.
+
+        Parameters:
+            game (GameLogic): The game to save
+            **extra: Other values to save with it, which must be JSON serialisable
+        """
+        with self._condition:
+            self._pending = (game, extra)
+            self._condition.notify()
+
+    def get_error(self):
+        """Returns the OSError or ValueError of the most recent failed save, or None."""
+        return self._error
+
+    def close(self):
+        """Saves the game waiting, if any, and stops the thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,319 @@
+"""
+Finds the shortest way to win a level of the Key Cave Adventure Game.
+
+The solver searches the states of a GameLogic (position, whether a key is
+held, which move increases were picked up and the moves left) with A*. Its
+heuristic is the exact number of moves needed when the move budget is
+ignored, so on most levels only the cells along an optimal path are
+expanded.
+
+A state is dropped when one expanded earlier at the same cell can do all it
+can. Only LABELS states are kept at each cell to compare with, after which a
+state must have more moves left than all of them, so the search stays within
+cells x moves states however many move increases a level has. When the move
+budget is that tight a solution needing a state dropped this way can be
+missed; with enough moves the solution found is always a shortest one.
+"""
+
+import heapq
+from array import array
+
+from game_logic import KEY, DOOR, MOVE_INCREASE
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+# The most states kept for each position and key to prune others against
+LABELS = 8
+
+# Turns a blocked bytearray (1 for blocked) into a walkable one (1 for walkable)
+_INVERT = bytes([1, 0]) + bytes(254)
+
+def walkable_cells(game):
+    """
+    Returns which cells of a game the player may enter.
+
+    Parameters:
+        game (GameLogic): The game to inspect
+
+    Returns:
+        (bytearray): 1 for each walkable cell and 0 otherwise, in reading
+            order over the dungeon_size x dungeon_size grid
+    """
+    size = game.get_dungeon_size()
+    information = game.get_game_information()
+    walkable = bytearray(b"\x01") * (size * size)
+    if game.is_compact() or game.is_chunked():
+        for row in range(size):
+            walkable[row * size:(row + 1) * size] = \
+                information.blocked_row(row, size).translate(_INVERT)
+    else:
+        for (row, col), entity in information.items():
+            if not entity.can_collide() and 0 <= row < size and 0 <= col < size:
+                walkable[row * size + col] = 0
+    return walkable
+
+class Solver:
+    """Finds optimal solutions for the current state of a GameLogic."""
+    def __init__(self, game):
+        """
+        Constructor of Solver. The distances used by the heuristic are
+        computed here, so a Solver should be reused rather than rebuilt.
+
+        Parameters:
+            game (GameLogic): The game to solve
+        """
+        self._size = size = game.get_dungeon_size()
+        self._walkable = walkable_cells(game)
+        player = game.get_player()
+        row, col = player.get_position()
+        self._start = row * size + col
+        self._moves = player.moves_remaining()
+        self._won = game.won()
+        self._has_key = any(item.get_id() == KEY for item in player.get_inventory())
+
+        index = game.get_index()
+        self._keys = {r * size + c for r, c in index.get_present(KEY)}
+        self._doors = {r * size + c for r, c in index.get_present(DOOR)}
+        # flat position -> (bit in the picked up mask, moves given)
+        self._move_increases = {}
+        for bit, position in enumerate(sorted(index.get_present(MOVE_INCREASE))):
+            entity = game.get_entity(position)
+            self._move_increases[position[0] * size + position[1]] = (bit, entity.get_moves())
+        self._total_bonus = sum(moves for _, moves in self._move_increases.values())
+        # bit in the picked up mask -> moves given
+        self._bonuses = [moves for _, moves in sorted(self._move_increases.values())]
+
+        # distance to the nearest door, and to the nearest door via a key
+        self._to_door = self._distances([(0, door) for door in self._doors])
+        self._to_key_door = self._distances([(self._to_door[key], key)
+                                             for key in self._keys
+                                             if self._to_door[key] >= 0])
+
+    def _neighbours(self, position):
+        """Yields (direction, position) for each cell next to position."""
+        size = self._size
+        row, col = divmod(position, size)
+        if row > 0:
+            yield "W", position - size
+        if row < size - 1:
+            yield "S", position + size
+        if col < size - 1:
+            yield "D", position + 1
+        if col > 0:
+            yield "A", position - 1
+
+    def _distances(self, seeds):
+        """
+        Breadth first search from several cells, each starting at its own
+        distance.
+
+        Parameters:
+            seeds (list<tuple<int, int>>): (starting distance, flat position)
+
+        Returns:
+            (array<int>): The smallest distance to each cell, -1 if unreachable
+        """
+        size = self._size
+        walkable = self._walkable
+        distances = array("l", [-1]) * (size * size)
+        seeds = sorted(seeds)
+        next_seed = 0
+        frontier = []
+        distance = 0
+        while frontier or next_seed < len(seeds):
+            if not frontier:
+                distance = max(distance, seeds[next_seed][0])
+            while next_seed < len(seeds) and seeds[next_seed][0] <= distance:
+                position = seeds[next_seed][1]
+                next_seed += 1
+                if walkable[position] and distances[position] < 0:
+                    distances[position] = distance
+                    frontier.append(position)
+
+            distance += 1
+            reached = []
+            for position in frontier:
+                row, col = divmod(position, size)
+                for neighbour, inside in ((position - size, row > 0),
+                                          (position + size, row < size - 1),
+                                          (position + 1, col < size - 1),
+                                          (position - 1, col > 0)):
+                    if inside and walkable[neighbour] and distances[neighbour] < 0:
+                        distances[neighbour] = distance
+                        reached.append(neighbour)
+            frontier = reached
+        return distances
+
+    def heuristic(self, position, has_key):
+        """
+        Returns the number of moves needed to win from position when the
+        move budget is ignored, or -1 if the door cannot be reached.
+
+        Parameters:
+            position (int): The flat position, row * dungeon_size + col
+            has_key (bool): Whether the player holds a key
+        """
+        if has_key:
+            return self._to_door[position]
+        return self._to_key_door[position]
+
+    def par(self):
+        """
+        Returns the fewest moves needed to win when the move budget is
+        ignored, or None if the level cannot be won at all.
+        """
+        if self._won:
+            return 0
+        distance = self.heuristic(self._start, self._has_key)
+        return distance if distance >= 0 else None
+
+    def _dominated(self, labels, left, mask):
+        """
+        Returns whether a state is no better than one already expanded at
+        the same position and key, with no more moves taken. An expanded
+        state with moves left a and picked up mask m dominates a state with
+        moves left b and picked up mask n when a, less the moves given by
+        the move increases in m but not n, is at least b: it can then follow
+        any path the new state could and never have fewer moves left.
+
+        Once LABELS states are kept for a cell, a state is also treated as
+        dominated unless it has more moves left than every one of them, which
+        bounds the states expanded at each cell by the moves there are.
+
+        Parameters:
+            labels (list<tuple<int, int>>): (moves left, picked up mask) of
+                the states expanded at the position
+            left (int): The moves left of the state
+            mask (int): The picked up mask of the state
+        """
+        if len(labels) >= LABELS and left <= max(labels)[0]:
+            return True
+        bonuses = self._bonuses
+        for other_left, other_mask in labels:
+            if other_left < left:
+                continue
+            extra = other_mask & ~mask
+            while extra and other_left >= left:
+                low = extra & -extra
+                other_left -= bonuses[low.bit_length() - 1]
+                extra ^= low
+            if other_left >= left:
+                return True
+        return False
+
+    def solve(self, moves=None):
+        """
+        Finds a shortest sequence of moves which wins the game without
+        running out of moves.
+
+        Parameters:
+            moves (int): The moves available, by default those the player
+                has left
+
+        Returns:
+            (str): The directions to travel in, for example "DDWSSA", or
+                None if no way to win with the moves available was found
+        """
+        if self._won:
+            return ""
+        if moves is None:
+            moves = self._moves
+        size = self._size
+        cells = size * size
+        walkable = self._walkable
+        keys = self._keys
+        doors = self._doors
+        move_increases = self._move_increases
+        total_bonus = self._total_bonus
+        to_door = self._to_door
+        to_key_door = self._to_key_door
+
+        start_key = 1 if self._has_key else 0
+        estimate = self.heuristic(self._start, start_key)
+        if estimate < 0 or estimate > moves + total_bonus:
+            return None
+
+        # states are encoded as ((picked up mask << 1) | has key) * cells + position
+        start = start_key * cells + self._start
+        best = {start: 0}
+        parents = {}
+        # (position, has key) -> [(moves left, picked up mask)] of the states
+        # expanded there, in the order of their g
+        expanded = {}
+        counter = 0
+        # (f, -g, counter, state, g, bonus, winning direction or None)
+        queue = [(estimate, 0, counter, start, 0, 0, None)]
+        while queue:
+            _, _, _, state, g, bonus, winning = heapq.heappop(queue)
+            if winning is not None:
+                path = [winning]
+                while state in parents:
+                    state, direction = parents[state]
+                    path.append(direction)
+                return "".join(reversed(path))
+            left = moves - g + bonus
+            if best.get(state, g) < g or left <= 0:
+                continue
+
+            position = state % cells
+            rest = state // cells
+            has_key = rest & 1
+            mask = rest >> 1
+            # states sharing a position and key are popped in order of g, as
+            # they share the heuristic, so an earlier one can do anything
+            # this one can unless this one has more moves to spare
+            labels = expanded.setdefault(rest & 1 | position << 1, [])
+            if self._dominated(labels, left, mask):
+                continue
+            if len(labels) >= LABELS:
+                labels.remove(min(labels))
+            labels.append((left, mask))
+
+            for direction, neighbour in self._neighbours(position):
+                if not walkable[neighbour]:
+                    continue
+                next_g = g + 1
+                if has_key and neighbour in doors:
+                    counter += 1
+                    heapq.heappush(queue, (next_g, -next_g, counter, state, next_g, bonus, direction))
+                    continue
+
+                next_key = has_key or (neighbour in keys)
+                next_mask = mask
+                next_bonus = bonus
+                pickup = move_increases.get(neighbour)
+                if pickup is not None and not mask >> pickup[0] & 1:
+                    next_mask = mask | 1 << pickup[0]
+                    next_bonus = bonus + pickup[1]
+
+                estimate = to_door[neighbour] if next_key else to_key_door[neighbour]
+                next_left = moves - next_g + next_bonus
+                if estimate < 0 or estimate > next_left + total_bonus - next_bonus:
+                    continue
+                labels = expanded.get(next_key | neighbour << 1)
+                if labels and self._dominated(labels, next_left, next_mask):
+                    continue
+
+                next_state = ((next_mask << 1) | next_key) * cells + neighbour
+                if best.get(next_state, next_g + 1) <= next_g:
+                    continue
+                best[next_state] = next_g
+                parents[next_state] = (state, direction)
+                counter += 1
+                heapq.heappush(queue, (next_g + estimate, -next_g, counter,
+                                       next_state, next_g, next_bonus, None))
+        return None
+
+def solve(game, moves=None):
+    """
+    Finds a shortest winning sequence of moves for a game.
+
+    Parameters:
+        game (GameLogic): The game to solve
+        moves (int): The moves available, by default those the player has left
+
+    Returns:
+        (str): The directions to travel in, or None if the game cannot be won
+    """
+    return Solver(game).solve(moves)
@@ -0,0 +1,8 @@
+"""Lets the tests import the modules of the game, which are not a package."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
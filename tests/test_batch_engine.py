@@ -0,0 +1,64 @@
+"""Tests that BatchEngine plays exactly as GameEngine in every storage mode."""
+
+import os
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import ROOT
+from batch_engine import ACTIONS, NOOP, BatchEngine
+from engine import GameEngine
+from game_logic import KEY, GameLogic
+from generator import generate_level
+from level_format import convert
+
+GAMES = 40
+STEPS = 80
+MODES = ["dict", "compact", "chunked", "binary"]
+
+@pytest.fixture(scope="module")
+def levels(tmp_path_factory):
+    """Returns (text level, moves) of the shipped levels and a generated one."""
+    directory = tmp_path_factory.mktemp("levels")
+    generated = str(directory / "generated.txt")
+    generate_level(generated, 30, seed=1)
+    return [(os.path.join(ROOT, "game1.txt"), 7), (os.path.join(ROOT, "game2.txt"), 12),
+            (os.path.join(ROOT, "game3.txt"), 19), (generated, 60)]
+
+def _build(level, moves, mode, directory):
+    """Builds a GameLogic of a text level stored in mode."""
+    if mode == "compact":
+        return GameLogic(level, compact=True, moves=moves)
+    if mode == "chunked":
+        return GameLogic(level, moves=moves, chunked=True, tile_size=4)
+    if mode == "binary":
+        binary = os.path.join(directory, os.path.basename(level) + ".kcl")
+        if not os.path.exists(binary):
+            convert(level, binary, moves)
+        return GameLogic(binary, moves=moves)
+    return GameLogic(level, moves=moves)
+
+@pytest.mark.parametrize("mode", MODES)
+def test_matches_game_engine(levels, mode, tmp_path):
+    for number, (level, moves) in enumerate(levels):
+        batch = BatchEngine(_build(level, moves, mode, tmp_path), GAMES)
+        engines = [GameEngine(_build(level, moves, mode, tmp_path)) for _ in range(GAMES)]
+        generator = random.Random(number)
+        for step in range(STEPS):
+            actions = np.array([generator.randrange(NOOP + 1) for _ in range(GAMES)])
+            moved = batch.step(actions)
+            for game, (engine, action) in enumerate(zip(engines, actions)):
+                logic = engine.get_game()
+                player = logic.get_player()
+                before = player.get_position()
+                if action != NOOP:
+                    engine.step(ACTIONS[action])
+                where = (level, mode, step, game)
+                assert moved[game] == (player.get_position() != before), where
+                assert (batch.get_rows()[game], batch.get_cols()[game]) == player.get_position(), where
+                assert batch.get_moves()[game] == player.moves_remaining(), where
+                keys = sum(1 for item in player.get_inventory() if item.get_id() == KEY)
+                assert batch.get_keys()[game] == keys, where
+                assert batch.won()[game] == logic.won(), where
@@ -0,0 +1,62 @@
+"""Tests of forking a GameLogic and undoing its moves."""
+
+import os
+
+from conftest import ROOT
+from engine import GameEngine
+from game_logic import KEY, GameLogic, OverlayGrid
+
+LEVEL = os.path.join(ROOT, "game2.txt")
+KEY_POSITION = (1, 6)
+
+def test_fork_leaves_the_game_alone():
+    game = GameLogic(LEVEL, moves=12)
+    information = game.get_game_information()
+    fork = game.fork()
+    assert game.get_game_information() is information
+    assert type(information) is dict
+
+    # the game picks up the key, which its fork must still see
+    GameEngine(game).step_many("DDDDWD")
+    assert game.get_entity(KEY_POSITION) is None
+    assert fork.get_entity(KEY_POSITION).get_id() == KEY
+    assert information[KEY_POSITION].get_id() == KEY
+
+    # forks of either game share one base rather than stacking overlays
+    for parent in (game, fork):
+        base = parent.fork().get_game_information().get_base()
+        assert base is information
+        assert not isinstance(base, OverlayGrid)
+
+def test_undo_and_redo_retrace_every_move():
+    game = GameLogic(LEVEL, moves=12)
+    game.start_journal()
+    # picks up the key and the move increase on the way to the door
+    states = [game.state_key()]
+    for direction in "DDDDWDSSSSSAAA":
+        game.play_move(direction)
+        states.append(game.state_key())
+    assert game.won()
+
+    for state in reversed(states[:-1]):
+        game.undo()
+        assert game.state_key() == state
+    assert not game.can_undo() and game.undo() is None
+    for state in states[1:]:
+        game.redo()
+        assert game.state_key() == state
+    assert not game.can_redo()
+
+def test_new_move_forgets_the_undone_ones():
+    game = GameLogic(LEVEL, moves=12)
+    game.start_journal(max_entries=2)
+    for direction in "DDS":
+        game.play_move(direction)
+    game.undo()
+    game.play_move("W")
+    assert not game.can_redo()
+    game.undo()
+    game.undo()
+    # only the last two moves were kept
+    assert not game.can_undo()
+    assert game.get_player().get_position() == (2, 2)
@@ -0,0 +1,27 @@
+"""Tests that generated levels are reproducible and can be won."""
+
+from game_logic import GameLogic
+from generator import LevelGenerator, generate_level
+from solver import Solver
+
+def test_same_seed_gives_the_same_level(tmp_path):
+    first, second, other = (str(tmp_path / name) for name in ("a.txt", "b.txt", "c.txt"))
+    assert generate_level(first, 60, seed=7) == generate_level(second, 60, seed=7)
+    generate_level(other, 60, seed=8)
+    with open(first, "rb") as a, open(second, "rb") as b, open(other, "rb") as c:
+        text = a.read()
+        assert text == b.read()
+        assert text != c.read()
+
+    # rows may be generated any number of times
+    generator = LevelGenerator(60, seed=7)
+    assert list(generator.rows()) == list(generator.rows())
+    assert b"\n".join(generator.rows()) + b"\n" == text
+
+def test_level_can_be_won_within_its_budget(tmp_path):
+    for seed in range(5):
+        level = str(tmp_path / f"level{seed}.txt")
+        budget = generate_level(level, 40, seed=seed)
+        game = GameLogic(level, moves=budget, compact=True)
+        solution = Solver(game).solve()
+        assert solution is not None and len(solution) <= budget
@@ -0,0 +1,41 @@
+"""Tests that leaderboard ranks count the scores of every bucket."""
+
+import random
+
+from leaderboard import BUCKET_SIZE, AsyncLeaderboard, Leaderboard
+
+def test_ranks_match_counting_every_score(tmp_path):
+    board = Leaderboard(str(tmp_path / "scores.db"))
+    generator = random.Random(0)
+    # scores either side of the bucket edges, with many ties
+    scores = [generator.choice([0, 1, BUCKET_SIZE - 1, BUCKET_SIZE, BUCKET_SIZE + 1,
+                                3 * BUCKET_SIZE, generator.randrange(5 * BUCKET_SIZE)])
+              for _ in range(500)]
+    board.add_many("game1.txt", ((f"player{number}", score)
+                                 for number, score in enumerate(scores)))
+    board.add("game2.txt", "other", 0)
+
+    assert board.count("game1.txt") == len(scores)
+    for score in (0, 1, BUCKET_SIZE - 1, BUCKET_SIZE, 2 * BUCKET_SIZE, 6 * BUCKET_SIZE):
+        assert board.rank("game1.txt", score) == sum(1 for s in scores if s <= score) + 1
+
+    # a new score ranks after those just as good
+    rank = board.add("game1.txt", "late", BUCKET_SIZE)
+    assert rank == sum(1 for s in scores if s <= BUCKET_SIZE) + 1
+    assert board.top("game1.txt", 3) == [(f"player{number}", 0) for number, score
+                                         in enumerate(scores) if score == 0][:3]
+    assert board.get_levels() == ["game1.txt", "game2.txt"]
+    board.close()
+
+def test_async_requests_are_written_on_close(tmp_path):
+    filename = str(tmp_path / "scores.db")
+    board = AsyncLeaderboard(filename)
+    results = []
+    board.request("add", "game1.txt", "first", 30, callback=results.append)
+    board.close()
+    board.poll()
+    assert results == [1]
+
+    board = Leaderboard(filename)
+    assert board.top("game1.txt") == [("first", 30)]
+    board.close()
@@ -0,0 +1,41 @@
+"""Tests that the profiler times instrumented methods and exports them."""
+
+import json
+import os
+import pstats
+
+from conftest import ROOT
+from game_logic import GameLogic
+from profiling import LatencyHistogram, Profiler
+
+def test_percentiles_are_within_a_bucket():
+    histogram = LatencyHistogram()
+    for nanoseconds in range(1, 100001):
+        histogram.record(nanoseconds)
+    assert histogram.get_count() == 100000
+    for fraction in (0.5, 0.9, 0.99):
+        exact = fraction * 100000
+        assert exact <= histogram.percentile(fraction) <= exact * 1.07
+
+def test_export_as_json_and_pstats(tmp_path):
+    profiler = Profiler()
+    original = GameLogic.__dict__["collision_check"]
+    profiler.instrument(GameLogic, "collision_check")
+    game = GameLogic(os.path.join(ROOT, "game2.txt"), moves=12)
+    for direction in "DDSW":
+        game.collision_check(direction)
+    profiler.uninstrument()
+    assert GameLogic.__dict__["collision_check"] is original
+    # calls are no longer timed once the original is back
+    game.collision_check("D")
+
+    profiler.export(str(tmp_path / "profile.json"))
+    with open(tmp_path / "profile.json") as file:
+        summary = json.load(file)
+    assert summary["GameLogic.collision_check"]["count"] == 4
+
+    profiler.export(str(tmp_path / "profile.prof"))
+    stats = pstats.Stats(str(tmp_path / "profile.prof")).stats
+    (function, (calls, _, seconds, _, _)), = stats.items()
+    assert function[2] == "GameLogic.collision_check"
+    assert calls == 4 and seconds > 0
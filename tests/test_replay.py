@@ -0,0 +1,70 @@
+"""Tests that input logs replay to the game that was played."""
+
+import io
+import os
+
+import pytest
+
+from conftest import ROOT
+from game_logic import GameLogic
+from replay import InputRecorder, read_header, replay
+
+LEVEL = os.path.join(ROOT, "game2.txt")
+
+def _write(tmp_path, recording):
+    log = tmp_path / "run.kcr"
+    log.write_bytes(recording.getvalue())
+    return str(log)
+
+def test_use_life_is_replayed(tmp_path):
+    game = GameLogic(LEVEL, compact=True, moves=12)
+    game.start_journal()
+    recording = io.BytesIO()
+    recorder = InputRecorder(recording, LEVEL, 12, lives=1)
+    for time, direction in enumerate("DDA", 1):
+        recorder.record(direction, time)
+        game.play_move(direction)
+    recorder.use_life(4)
+    game.undo()
+    recorder.record("D", 5)
+    game.play_move("D")
+    recorder.close()
+
+    report = replay(_write(tmp_path, recording), LEVEL)
+    assert report["moves"] == game.get_player().moves_remaining()
+
+def test_restarted_game_records_its_lives(tmp_path, monkeypatch):
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    import views
+    from leaderboard import AsyncLeaderboard
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(views, "AsyncLeaderboard",
+                        lambda: AsyncLeaderboard(str(tmp_path / "scores.db")))
+    try:
+        root.withdraw()
+        app = views.GameApp(root, task=views.MASTERS, dungeon_name="game2.txt",
+                            autosave_interval=None)
+        # use up every life, so that a stale header would allow none
+        for _ in range(3):
+            app.queue_action("D")
+            app.use_life()
+        app.restart()
+        for direction in "DDA":
+            app.queue_action(direction)
+        app.use_life()
+        app.queue_action("D")
+
+        app._recorder.close()
+        recording = app._recording
+        lives, _, _ = read_header(io.BytesIO(recording.getvalue()))
+        assert lives == 3
+        report = replay(_write(tmp_path, recording), "game2.txt")
+        player = app._game.get_player()
+        assert report["moves"] == player.moves_remaining()
+        assert report["lives_used"] == 1
+    finally:
+        root.destroy()
@@ -0,0 +1,78 @@
+"""Tests that saved games load back to the game that was saved."""
+
+import os
+
+import pytest
+
+import savegame
+from conftest import ROOT
+from game_logic import KEY, MOVE_INCREASE, GameLogic
+
+LEVEL = os.path.join(ROOT, "game2.txt")
+
+def test_version_0_saved_game_is_migrated(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    saved = tmp_path / "old.txt"
+    # MASTERS, player at (1, 6), move increase left, key picked up, 25 s, 8 moves, 2 lives
+    saved.write_text("3\n1\n6\n0\n1\n25\n8\n2\n")
+    game, saved_info = savegame.load(str(saved))
+    assert saved_info == {"task": 3, "time": 25, "lives": 2}
+    player = game.get_player()
+    assert player.get_position() == (1, 6)
+    assert player.moves_remaining() == 8
+    assert [item.get_id() for item in player.get_inventory()] == [KEY]
+    assert game.get_entity((1, 6)) is None
+    assert game.get_entity((6, 6)).get_id() == MOVE_INCREASE
+
+def test_unknown_file_is_refused(tmp_path):
+    saved = tmp_path / "notes.txt"
+    saved.write_text("not\na saved game\n")
+    with pytest.raises(ValueError):
+        savegame.load(str(saved))
+
+def test_autosaver_saves_the_snapshot(tmp_path):
+    game = GameLogic(LEVEL, moves=12)
+    game.start_journal()
+    for direction in "DDS":
+        game.play_move(direction)
+    autosaver = savegame.Autosaver(str(tmp_path / "autosave.json"))
+    autosaver.submit(game.snapshot(), time=3)
+    # moves made after the snapshot are not in the save
+    game.play_move("S")
+    game.undo()
+    game.undo()
+    autosaver.close()
+    assert autosaver.get_error() is None
+
+    loaded, saved_info = savegame.load(str(tmp_path / "autosave.json"))
+    assert saved_info == {"time": 3}
+    assert loaded.get_player().get_position() == (3, 3)
+    assert len(loaded.get_journal()) == 3
+
+def test_saved_game_loads_to_the_same_state(tmp_path):
+    game = GameLogic(LEVEL, moves=12)
+    game.start_journal()
+    # picks up the key on the way
+    for direction in "DDDDWD":
+        game.play_move(direction)
+    game.undo()
+    filename = str(tmp_path / "save.json")
+    savegame.save(filename, game, task=2, time=41)
+
+    loaded, saved_info = savegame.load(filename)
+    assert saved_info == {"task": 2, "time": 41}
+    assert loaded.state_key() == game.state_key()
+    assert loaded.to_state() == game.to_state()
+    # the journal comes back too, undone move included
+    loaded.redo()
+    game.redo()
+    assert loaded.state_key() == game.state_key()
+    assert loaded.get_entity((1, 6)) is None
+
+def test_newer_version_is_refused(tmp_path):
+    filename = str(tmp_path / "save.json")
+    document = savegame.to_document(GameLogic(LEVEL, moves=12))
+    document["version"] = savegame.VERSION + 1
+    savegame.write_document(filename, document)
+    with pytest.raises(ValueError):
+        savegame.load(filename)
@@ -0,0 +1,69 @@
+"""Tests that the solver finds shortest wins within the move budget."""
+
+import os
+
+import pytest
+
+from conftest import ROOT
+from engine import GameEngine
+from game_logic import DIRECTIONS, GameLogic
+from generator import generate_level
+from solver import Solver
+
+def _shortest(game):
+    """Returns the fewest moves which win game, by breadth first search over its states."""
+    frontier = [game]
+    seen = {game.state_key()}
+    depth = 0
+    while frontier:
+        depth += 1
+        reached = []
+        for state in frontier:
+            for direction in DIRECTIONS:
+                engine = GameEngine(state.fork())
+                engine.step(direction)
+                child = engine.get_game()
+                if child.won():
+                    return depth
+                key = child.state_key()
+                if not child.check_game_over() and key not in seen:
+                    seen.add(key)
+                    reached.append(child)
+        frontier = reached
+    return None
+
+def _wins(game, path):
+    engine = GameEngine(game.fork())
+    engine.step_many(path)
+    return engine.get_game().won()
+
+@pytest.mark.parametrize("level, moves", [("game1.txt", 7), ("game2.txt", 12),
+                                          ("game2.txt", 14), ("game3.txt", 19)])
+def test_solution_is_shortest(level, moves):
+    game = GameLogic(os.path.join(ROOT, level), moves=moves)
+    path = Solver(game).solve()
+    shortest = _shortest(game)
+    if shortest is None:
+        assert path is None
+    else:
+        assert len(path) == shortest
+        assert _wins(game, path)
+
+def test_budget_below_par_is_refused():
+    game = GameLogic(os.path.join(ROOT, "game1.txt"), moves=7)
+    solver = Solver(game)
+    assert solver.par() == 6
+    assert solver.solve(6) == "DDWSSA"
+    assert solver.solve(5) is None
+
+def test_tight_budget_on_a_large_level(tmp_path):
+    level = str(tmp_path / "large.txt")
+    budget = generate_level(level, 100, seed=1, move_increase_density=0.02)
+    game = GameLogic(level, moves=budget, compact=True)
+    solver = Solver(game)
+    par = solver.par()
+    # far too few moves to win without a detour for move increases
+    path = solver.solve(par * 3 // 4)
+    assert path is not None and len(path) > par
+    assert _wins(GameLogic(level, moves=par * 3 // 4, compact=True), path)
+    assert solver.solve(par // 4) is None
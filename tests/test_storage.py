@@ -0,0 +1,77 @@
+"""Tests that the storage modes of GameLogic play alike and release their files."""
+
+import os
+import random
+
+import pytest
+
+from conftest import ROOT
+from engine import GameEngine
+from game_logic import DIRECTIONS, GameLogic
+from generator import generate_level
+from level_format import convert
+from solver import Solver, walkable_cells
+
+LEVEL = os.path.join(ROOT, "game2.txt")
+MODES = ["compact", "chunked", "binary"]
+STEPS = 200
+
+def _build(level, moves, mode):
+    """Builds a GameLogic of a text level stored in mode."""
+    if mode == "binary":
+        binary = os.path.splitext(level)[0] + ".kcl"
+        convert(level, binary, moves)
+        return GameLogic(binary, moves=moves)
+    if mode == "compact":
+        return GameLogic(level, compact=True, moves=moves)
+    if mode == "chunked":
+        return GameLogic(level, moves=moves, chunked=True, tile_size=4)
+    return GameLogic(level, moves=moves)
+
+def _cells(game):
+    """Returns the id of the entity in each cell of a game, None for empty cells."""
+    size = game.get_dungeon_size()
+    return [getattr(game.get_entity((row, col)), "get_id", lambda: None)()
+            for row in range(size) for col in range(size)]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_storage_modes_play_alike(mode, tmp_path):
+    shipped = str(tmp_path / "game2.txt")
+    with open(LEVEL) as source, open(shipped, "w") as copy:
+        copy.write(source.read())
+    generated = str(tmp_path / "generated.txt")
+    generate_level(generated, 30, seed=3, move_increase_density=0.05)
+    for number, (level, moves) in enumerate(((shipped, 12), (generated, 500))):
+        expected = GameLogic(level, moves=moves)
+        game = _build(level, moves, mode)
+        assert _cells(game) == _cells(expected)
+        assert walkable_cells(game) == walkable_cells(expected)
+        for each in (expected, game):
+            each.start_journal()
+
+        generator = random.Random(number)
+        for step in range(STEPS):
+            if generator.random() < 0.2:
+                expected.undo()
+                game.undo()
+            else:
+                direction = generator.choice(sorted(DIRECTIONS))
+                assert game.play_move(direction) == expected.play_move(direction)
+            assert game.state_key() == expected.state_key(), (level, step)
+            if step % 50 == 0:
+                # a fork searches from the same state in either mode
+                assert Solver(game.fork()).solve() == Solver(expected.fork()).solve()
+        assert _cells(game) == _cells(expected)
+        game.close()
+
+def test_closing_releases_the_level(tmp_path):
+    binary = str(tmp_path / "game2.kcl")
+    convert(LEVEL, binary, 12)
+    with GameLogic(binary) as game:
+        GameEngine(game.fork()).step_many("DDSS")
+        level = game._mapped_level
+    assert level._map.closed
+
+    with GameEngine(GameLogic(LEVEL, moves=12, chunked=True, tile_size=4)) as engine:
+        engine.step_many("DDSS")
+    assert engine.get_game()._level_file._file.closed
@@ -0,0 +1,192 @@
+"""
+Checks a library of level files for mistakes and reports how hard they are.
+
+Each level is parsed with load_game, checked for structural errors, and
+solved to find whether it can be won within its move budget and its par,
+the fewest moves needed. Levels are spread over a pool of processes.
+
+Usage:
+    python validator.py levels/ "more/game*.txt" --output report.jsonl
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from game_logic import (GAME_LEVELS, PLAYER, KEY, DOOR, WALL, MOVE_INCREASE,
+                        SPACE, load_game, GameLogic)
+from parallel import imap_tasks
+from solver import Solver
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+LEVEL_CHARACTERS = {PLAYER, KEY, DOOR, WALL, MOVE_INCREASE, SPACE}
+
+def find_levels(patterns):
+    """
+    Expands directories and glob patterns into level files.
+
+    Parameters:
+        patterns (list<str>): Directories, glob patterns or file names
+
+    Returns:
+        (list<str>): The level files, sorted within each pattern and
+            without duplicates
+    """
+    levels = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.txt")))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        for level in matches:
+            levels.setdefault(os.path.normpath(level), None)
+    return list(levels)
+
+def check_level(dungeon):
+    """
+    Finds the structural errors of a level.
+
+    Parameters:
+        dungeon (list<str>): The lines of the level, as returned by load_game
+
+    Returns:
+        (list<str>): A description of each error, empty if there are none
+    """
+    if not dungeon:
+        return ["the level is empty"]
+
+    errors = []
+    size = len(dungeon)
+    for row, line in enumerate(dungeon):
+        if len(line) != size:
+            errors.append(f"row {row} has {len(line)} cells, expected {size}")
+            break
+
+    counts = {}
+    unknown = set()
+    for line in dungeon:
+        for char in set(line):
+            counts[char] = counts.get(char, 0) + line.count(char)
+            if char not in LEVEL_CHARACTERS:
+                unknown.add(char)
+    if unknown:
+        errors.append(f"unknown characters {''.join(sorted(unknown))!r}")
+    if counts.get(PLAYER, 0) == 0:
+        errors.append("there is no player")
+    elif counts[PLAYER] > 1:
+        errors.append(f"there are {counts[PLAYER]} players")
+    if counts.get(KEY, 0) == 0:
+        errors.append("there is no key")
+    if counts.get(DOOR, 0) == 0:
+        errors.append("there is no door")
+    return errors
+
+def validate_level(filename, moves=None):
+    """
+    Checks and solves a single level.
+
+    Parameters:
+        filename (str): The level file
+        moves (int): The move budget for levels which are not in GAME_LEVELS,
+            if None only whether the level can be won at all is checked
+
+    Returns:
+        (dict): The report for the level
+    """
+    start = time.perf_counter()
+    report = {
+        "level": filename,
+        "errors": [],
+        "moves": GAME_LEVELS.get(os.path.basename(filename), moves),
+        "solvable": False,
+        "par": None,
+        "solution": None,
+        }
+    try:
+        dungeon = load_game(filename)
+    except (OSError, UnicodeDecodeError) as error:
+        report["errors"].append(f"cannot read the level: {error}")
+        dungeon = None
+
+    if dungeon is not None:
+        report["errors"] = check_level(dungeon)
+    if not report["errors"]:
+        game = GameLogic(filename, compact=True, moves=report["moves"] or 0, dungeon=dungeon)
+        solver = Solver(game)
+        report["par"] = solver.par()
+        if report["par"] is None:
+            report["errors"].append("the door cannot be reached with a key")
+        elif report["moves"] is None:
+            report["solvable"] = True
+        else:
+            solution = solver.solve()
+            report["solvable"] = solution is not None
+            report["solution"] = solution
+
+    report["seconds"] = round(time.perf_counter() - start, 6)
+    return report
+
+def _validate(arguments):
+    """Unpacks the arguments of validate_level for Pool.imap_unordered."""
+    return validate_level(*arguments)
+
+def validate_levels(filenames, moves=None, workers=None):
+    """
+    Validates many levels over a pool of processes.
+
+    Parameters:
+        filenames (list<str>): The level files
+        moves (int): The move budget for levels which are not in GAME_LEVELS
+        workers (int): The number of processes, by default one per core
+
+    Yields:
+        (dict): The report for each level, in the order they finish
+    """
+    tasks = [(filename, moves) for filename in filenames]
+    return imap_tasks(_validate, tasks, workers)
+
+def main(argv=None):
+    """
+    Validates the levels given on the command line and writes a report with
+    one JSON object per level, followed by a summary on stderr.
+
+    Returns:
+        (int): 0 if every level is valid and solvable, otherwise 1
+    """
+    parser = argparse.ArgumentParser(description="Validate Key Cave Adventure levels.")
+    parser.add_argument("levels", nargs="+",
+                        help="level files, directories or glob patterns")
+    parser.add_argument("-o", "--output", help="write the report to this file")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of processes (default: one per core)")
+    parser.add_argument("-m", "--moves", type=int, default=None,
+                        help="move budget for levels which are not in GAME_LEVELS")
+    args = parser.parse_args(argv)
+
+    filenames = find_levels(args.levels)
+    output = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    total = failed = 0
+    try:
+        for report in validate_levels(filenames, args.moves, args.workers):
+            total += 1
+            if report["errors"] or not report["solvable"]:
+                failed += 1
+            output.write(json.dumps(report) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"{total} levels, {failed} invalid or unsolvable, "
+          f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1662 @@
+"""
+The tkinter views of the Key Cave Adventure Game and the GameApp which
+connects them to the model in game_logic.py.
+
+This module is imported by key_adventure.py only when the game is started
+or one of its views is asked for, so that the model can be used without
+tkinter or PIL. PIL itself is only imported once a sprite is loaded.
+"""
+
+import io
+import threading
+import time
+import tkinter as tk
+from tkinter import messagebox
+from tkinter import filedialog
+from tkinter import simpledialog
+from collections import OrderedDict, deque
+from game_logic import (PLAYER, KEY, DOOR, WALL, MOVE_INCREASE, SPACE,
+                        DIRECTIONS, Key, MoveIncrease, Door, GameLogic)
+from engine import GameEngine
+from leaderboard import AsyncLeaderboard
+from replay import (InputRecorder, USE_LIFE, EXTENSION, level_hash, read_header,
+                    read_events)
+import savegame
+from profiling import Profiler
+
+__author__ = "Yi-Chi (Oliver) Kuo"
+__date__ = "30 oct 2020"
+
+TASK_ONE = 1
+TASK_TWO = 2
+MASTERS = 3
+
+# dungeons with more rows and columns than this scroll to follow the player
+VIEW_SIZE = 20
+# milliseconds between replayed moves made within the same second
+REPLAY_INTERVAL = 150
+# milliseconds between checks for finished leaderboard queries
+LEADERBOARD_POLL = 100
+# the file the game is saved to every AUTOSAVE_INTERVAL milliseconds
+AUTOSAVE_FILE = "autosave" + savegame.EXTENSION
+AUTOSAVE_INTERVAL = 30000
+# the most times the dungeon is redrawn per second
+FRAME_RATE = 60
+# milliseconds between updates of the performance HUD
+HUD_INTERVAL = 500
+# seconds quitting waits for a level which is still being prefetched
+PREFETCH_CLOSE_TIMEOUT = 0.5
+# the levels of a campaign, in the order they are played
+CAMPAIGN = ["game1.txt", "game2.txt", "game3.txt"]
+
+class SpriteCache:
+    """
+    A cache of the images used by the views, shared by all of them.
+
+    Each image file is read and decoded once. Resized copies are kept per
+    (filename, size), as are backgrounds composited from many cells, and
+    the least recently used ones are discarded when more than max_sprites
+    are held.
+    """
+    def __init__(self, max_sprites=64):
+        """
+        Constructor of SpriteCache.
+
+        Parameters:
+            max_sprites (int): The maximum number of resized images to keep
+        """
+        self._max_sprites = max_sprites
+        self._sources = {}
+        self._sprites = OrderedDict()
+        # backgrounds composited by prepare_background, not yet displayed
+        self._prepared = {}
+
+    def get_source(self, filename):
+        """
+        Returns the decoded image stored in filename, reading it from disk
+        only the first time it is requested.
+
+        Parameters:
+            filename (str): The path of the image file
+
+        Returns:
+            (Image.Image): The decoded image
+        """
+        image = self._sources.get(filename)
+        if image is None:
+            from PIL import Image
+            image = Image.open(filename)
+            image.load()
+            self._sources[filename] = image
+        return image
+
+    def get(self, filename, size):
+        """
+        Returns the image stored in filename resized to size.
+
+        Parameters:
+            filename (str): The path of the image file
+            size (tuple<int, int>): The (width, height) of the image in pixels
+
+        Returns:
+            (ImageTk.PhotoImage): The resized image ready to be displayed
+        """
+        key = (filename, size)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+
+        from PIL import ImageTk
+        sprite = ImageTk.PhotoImage(self.get_source(filename).resize(size))
+        self._remember(key, sprite)
+        return sprite
+
+    def compose_background(self, floor, wall, walls, rows, cols, cell_size):
+        """
+        Composites a block of cells into a single image: the floor under
+        every cell, with the wall drawn over it at each wall.
+
+        Parameters:
+            floor (str): The path of the floor image file
+            wall (str): The path of the wall image file
+            walls (frozenset<tuple<int, int>>): The (row, col) of each wall,
+                counted from the top left cell of the block
+            rows (int): The number of rows of the block
+            cols (int): The number of columns of the block
+            cell_size (int): The width and height of a cell in pixels
+
+        Returns:
+            (Image.Image): The image of the block
+        """
+        from PIL import Image
+        size = (cell_size, cell_size)
+        floor = self.get_source(floor).convert("RGBA").resize(size)
+        wall = Image.alpha_composite(floor, self.get_source(wall).convert("RGBA").resize(size))
+        strip = Image.new("RGBA", (cols * cell_size, cell_size))
+        for col in range(cols):
+            strip.paste(floor, (col * cell_size, 0))
+        background = Image.new("RGBA", (cols * cell_size, rows * cell_size))
+        for row in range(rows):
+            background.paste(strip, (0, row * cell_size))
+        for row, col in walls:
+            background.paste(wall, (col * cell_size, row * cell_size))
+        return background
+
+    def get_background(self, floor, wall, walls, rows, cols, cell_size):
+        """
+        Returns a block of cells composited by compose_background, ready to
+        be displayed. The parameters are those of compose_background.
+
+        Returns:
+            (ImageTk.PhotoImage): The image of the block
+        """
+        key = (floor, wall, walls, rows, cols, cell_size)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+
+        from PIL import ImageTk
+        image = self._prepared.pop(key, None)
+        if image is None:
+            image = self.compose_background(*key)
+        sprite = ImageTk.PhotoImage(image)
+        self._remember(key, sprite)
+        return sprite
+
+    def prepare_background(self, floor, wall, walls, rows, cols, cell_size):
+        """
+        Composites a block of cells for a later get_background with the same
+        parameters. Unlike get_background, this does not use tkinter, so it
+        may be called on any thread.
+        """
+        key = (floor, wall, walls, rows, cols, cell_size)
+        if key not in self._sprites and key not in self._prepared:
+            self._prepared[key] = self.compose_background(*key)
+
+    def _remember(self, key, sprite):
+        """Keeps a sprite, discarding the least recently used ones beyond max_sprites."""
+        self._sprites[key] = sprite
+        while len(self._sprites) > self._max_sprites:
+            self._sprites.popitem(last=False)
+
+    def clear(self):
+        """Discards every cached image."""
+        self._sources.clear()
+        self._sprites.clear()
+        self._prepared.clear()
+
+SPRITES = SpriteCache()
+
+class AbstractGrid(tk.Canvas):
+    """An abstract view class which inherits from tk.Canvas."""
+    def __init__(self, master, rows, cols, width, height, **kwargs):
+        """
+        Constrctor of AbstractGrid.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            rows (int): the number of rows in the grid
+            cols (int): the number of columns in the grid
+            width (int): the number of pixels for the width of the grid
+            height (int): the number of pixels for the height of the grid
+            **kwargs: Optional arguments
+        """
+        super().__init__(master, **kwargs)
+        self._master = master
+        self._rows = rows
+        self._cols = cols
+        self._width = width
+        self._height = height
+        self.config(width=width, height=height)
+        self._cell_width = self._width//self._cols
+        self._cell_height = self._height//self._rows
+
+    def get_bbox(self, position):
+        """Returns the bounding box for the (row, col) position."""
+        row, col = position
+        x0 = col * self._cell_width
+        y0 = row * self._cell_height
+        x1 = x0 + self._cell_width
+        y1 = y0 + self._cell_height
+        bbox = (x0,y0,x1,y1)
+        return bbox
+
+    def pixel_to_position(self,pixel):
+        """
+        Converts the x, y pixel position to a (row, col) position.
+
+        Parameters:
+            pixel(tuple<int, int>): pixel position
+
+        Returns:
+            position(tuple<int, int>): Returns a (row, col) position
+        """
+        x, y = pixel
+        position = (y//self._cell_height, x//self._cell_width)
+        return position
+
+    def get_position_center(self, position):
+        """
+        Gets the graphics coordinates for the center of the cell
+        at the given (row, col) position.
+
+        Parameters:
+            position(tuple<int, int>): (row, col) position
+
+        Returns:
+            position_center(tuple<int, int>): Returns a pixel position
+            for the center of the cell
+        """
+        x0, y0, x1, y1 = self.get_bbox(position)
+        position_center = ((x0 + x1)/2, (y0 + y1)/2)
+        return position_center
+
+    def annotate_position(self, position, text):
+        """Annotates the cell at the given (row, col) position with the provided text."""
+        self.create_text(self.get_position_center(position),text=text)
+
+def cells_outside(region, other):
+    """
+    Yields the positions inside region which are not inside other, visiting
+    only the strips of region that other does not cover.
+
+    Parameters:
+        region (tuple<int, int, int, int>): (top, left, bottom, right),
+            where bottom and right are exclusive
+        other (tuple<int, int, int, int>): Another region, or None
+    """
+    top, left, bottom, right = region
+    if other is None:
+        other = (top, left, top, left)
+    other_top, other_left, other_bottom, other_right = other
+    for row in range(top, bottom):
+        if other_top <= row < other_bottom:
+            columns = [*range(left, min(right, other_left)),
+                       *range(max(left, other_right), right)]
+        else:
+            columns = range(left, right)
+        for col in columns:
+            yield (row, col)
+
+class AbstractDungeonMap(AbstractGrid):
+    """
+    An abstract view of the dungeon which keeps its canvas items between
+    frames and only redraws the cells whose content has changed. Entities
+    whose character is in STATIC are drawn by draw_background only and
+    have no canvas items of their own.
+
+    If the dungeon is larger than view_size, only a view_size x view_size
+    window around the player is shown, and only the cells of that window
+    plus a margin have canvas items. When the player moves the canvas
+    scrolls, so the existing items shift without being touched and only
+    the strip of cells coming into the margin is drawn.
+    """
+    STATIC = frozenset()
+
+    def __init__(self, master, size, width, view_size=None, margin=2, **kwargs):
+        """
+        Construct a view of the dungeon.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            size (int): the number of rows and columns in the grid
+            width (int): the number of pixels for the width
+                and height of the grid
+            view_size (int): the number of rows and columns to show at once,
+                by default the whole grid
+            margin (int): the number of cells drawn beyond each edge of
+                the view
+            **kwargs: Optional arguments
+        """
+        self._view_limit = view_size
+        if view_size is not None and view_size >= size:
+            view_size = None
+        cells = view_size or size
+        super().__init__(master, cells, cells, width, width, **kwargs)
+        self._size = size
+        self._view_size = view_size
+        self._margin = margin
+        if view_size is not None:
+            self.config(scrollregion=(0, 0, size*self._cell_width, size*self._cell_height))
+        # position -> character currently displayed at that position
+        self._drawn = None
+        # positions holding something other than a wall when they were drawn
+        self._watched = set()
+        self._last_player_pos = None
+        # (top, left, bottom, right) of the cells with canvas items, when scrolling
+        self._region = None
+        self._camera = None
+
+    def is_scrolling(self):
+        """Returns True if only a window of the dungeon around the player is shown."""
+        return self._view_size is not None
+
+    def layout(self, size):
+        """
+        Returns how a dungeon of size would be shown, without using tkinter.
+
+        Returns:
+            (tuple<int, int>): The number of rows and columns shown at once,
+                None if the whole dungeon fits, and the width of a cell in pixels
+        """
+        view_size = self._view_limit
+        if view_size is not None and view_size >= size:
+            view_size = None
+        return view_size, self._width // (view_size or size)
+
+    def view_region(self, size, view_size, player_pos):
+        """
+        Returns where the view of a dungeon of size is when scrolling.
+
+        Returns:
+            (tuple<tuple<int, int>, tuple<int, int, int, int>>): The (top, left)
+                cell shown, and the (top, left, bottom, right) of the cells
+                with canvas items
+        """
+        margin = self._margin
+        row, col = player_pos
+        top = min(max(row - view_size//2, 0), size - view_size)
+        left = min(max(col - view_size//2, 0), size - view_size)
+        region = (max(top - margin, 0), max(left - margin, 0),
+                  min(top + view_size + margin, size), min(left + view_size + margin, size))
+        return (top, left), region
+
+    def set_size(self, size):
+        """
+        Shows a dungeon of another size, removing every canvas item.
+
+        Parameters:
+            size (int): the number of rows and columns in the new dungeon
+        """
+        self.clear()
+        self._view_size, cell = self.layout(size)
+        self._size = size
+        self._rows = self._cols = self._view_size or size
+        self._cell_width = self._cell_height = cell
+        if self._view_size is not None:
+            self.config(scrollregion=(0, 0, size*cell, size*cell))
+        else:
+            self.config(scrollregion=(0, 0, self._width, self._height))
+            self.xview_moveto(0)
+            self.yview_moveto(0)
+
+    def prepare(self, game):
+        """
+        Does the work for the first frame of game which does not need
+        tkinter, so that it can be done on another thread beforehand.
+
+        Parameters:
+            game (GameLogic): A game which will be shown next
+        """
+        pass
+
+    def draw_grid(self, game_information, player_pos):
+        """
+        Displays the dungeon, only updating the cells which changed since
+        the previous frame.
+
+        parameter:
+            game_information (dict<tuple<int, int>: Entity): Dictionary
+                containing the position and the corresponding Entity
+            player_pos (tuple<int, int>): The position of the Player
+        """
+        if self._view_size is not None:
+            self.scroll_to(game_information, player_pos)
+        elif self._drawn is None:
+            self._drawn = {}
+            self._watched = set()
+            self.draw_background(game_information)
+            for position, entity in game_information.items():
+                char = entity.get_id()
+                if char != WALL:
+                    self._watched.add(position)
+                if char not in self.STATIC:
+                    self.draw_cell(position, char)
+                self._drawn[position] = char
+
+        changed = set(self._watched)
+        changed.add(player_pos)
+        if self._last_player_pos is not None:
+            changed.add(self._last_player_pos)
+
+        for position in changed:
+            if self._region is not None and not self.in_region(position):
+                continue
+            entity = game_information.get(position)
+            if entity is not None:
+                char = entity.get_id()
+            elif position == player_pos:
+                char = PLAYER
+            else:
+                char = SPACE
+            if self._drawn.get(position, SPACE) != char:
+                self.draw_cell(position, char)
+                self._drawn[position] = char
+        self._last_player_pos = player_pos
+
+    def in_region(self, position):
+        """Returns True if position has canvas items when scrolling."""
+        top, left, bottom, right = self._region
+        row, col = position
+        return top <= row < bottom and left <= col < right
+
+    def scroll_to(self, game_information, player_pos):
+        """
+        Centres the view on the player, drawing the cells which come into
+        the margin and erasing the ones which leave it.
+
+        parameter:
+            game_information (dict<tuple<int, int>: Entity): Dictionary
+                containing the position and the corresponding Entity
+            player_pos (tuple<int, int>): The position of the Player
+        """
+        size = self._size
+        (top, left), region = self.view_region(size, self._view_size, player_pos)
+
+        if self._drawn is None:
+            self._drawn = {}
+            self._watched = set()
+        if region != self._region:
+            if self._region is not None:
+                for position in cells_outside(self._region, region):
+                    self.erase_cell(position)
+                    self._drawn.pop(position, None)
+                    self._watched.discard(position)
+            self.draw_background(game_information, region)
+            for position in cells_outside(region, self._region):
+                entity = game_information.get(position)
+                if entity is not None:
+                    char = entity.get_id()
+                    if char != WALL:
+                        self._watched.add(position)
+                    if char not in self.STATIC:
+                        self.draw_cell(position, char)
+                    self._drawn[position] = char
+            self._region = region
+
+        if (top, left) != self._camera:
+            self.xview_moveto(left / size)
+            self.yview_moveto(top / size)
+            self._camera = (top, left)
+
+    def refresh(self):
+        """
+        Makes the next frame read every drawn cell again, which is needed
+        after items are put back into the dungeon while scrolling.
+        """
+        if self._view_size is not None:
+            self.clear()
+
+    def clear(self):
+        """Removes every canvas item so that the next frame is drawn in full."""
+        self.delete("all")
+        self._drawn = None
+        self._last_player_pos = None
+        self._region = None
+        self._camera = None
+
+    def draw_background(self, game_information, region=None):
+        """
+        Draws the parts of the dungeon which never change.
+
+        parameter:
+            game_information (dict<tuple<int, int>: Entity): Dictionary
+                containing the position and the corresponding Entity
+            region (tuple<int, int, int, int>): When scrolling, the
+                (top, left, bottom, right) of the cells with canvas items,
+                and by default the whole dungeon
+        """
+        pass
+
+    def draw_cell(self, position, char):
+        """
+        Draws the given character at position, reusing the canvas items
+        already at that position.
+
+        parameter:
+            position (tuple<int, int>): The (row, col) position of the cell
+            char (str): The character of the entity to display
+        """
+        raise NotImplementedError
+
+    def erase_cell(self, position):
+        """Deletes the canvas items of the cell at position, when scrolling."""
+        raise NotImplementedError
+
+class DungeonMap(AbstractDungeonMap):
+    """Display of the dungeon"""
+    OBJECTS = {
+        WALL:('Dark grey', None),
+        KEY:('Yellow','Trash'),
+        PLAYER:('Medium spring green', 'Ibis'),
+        MOVE_INCREASE:('Orange', 'Banana'),
+        DOOR:('Red', 'Nest')
+        }
+
+    def __init__(self, master, size, width, **kwargs):
+        """
+        Construct a view of the dungeon.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            size (int): the number of rows and columns in the grid
+            width (int): the number of pixels for the width
+                and height of the grid
+            **kwargs: Optional arguments, including view_size and margin
+        """
+        super().__init__(master, size, width, **kwargs)
+        # position -> (rectangle id, text id)
+        self._items = {}
+
+    def clear(self):
+        """Removes every canvas item so that the next frame is drawn in full."""
+        super().clear()
+        self._items = {}
+
+    def draw_cell(self, position, char):
+        """
+        Draws a coloured, annotated rectangle for char at position, or
+        hides the rectangle if the cell is now empty.
+
+        parameter:
+            position (tuple<int, int>): The (row, col) position of the cell
+            char (str): The character of the entity to display
+        """
+        items = self._items.get(position)
+        if char not in self.OBJECTS:
+            if items is not None:
+                for item in items:
+                    self.itemconfig(item, state=tk.HIDDEN)
+            return
+
+        color, text = self.OBJECTS[char]
+        if items is None:
+            rectangle = self.create_rectangle(self.get_bbox(position),
+                                              fill=color, outline='black')
+            annotation = self.create_text(self.get_position_center(position),
+                                          text=text)
+            self._items[position] = (rectangle, annotation)
+        else:
+            rectangle, annotation = items
+            self.itemconfig(rectangle, fill=color, state=tk.NORMAL)
+            self.itemconfig(annotation, text=text, state=tk.NORMAL)
+
+    def erase_cell(self, position):
+        """Deletes the rectangle and text of the cell at position."""
+        items = self._items.pop(position, None)
+        if items is not None:
+            self.delete(*items)
+
+class AdvancedDungeonMap(AbstractDungeonMap):
+    """
+    Display of the advanced dungeon.
+
+    The floor and walls are composited with PIL into one background image,
+    or into one image per TILE_SIZE x TILE_SIZE block of cells when
+    scrolling, so only the player, keys, doors and move increases are
+    canvas items of their own.
+    """
+    STATIC = frozenset((WALL,))
+    TILE_SIZE = 8
+    IMAGE_FILES = {
+        DOOR:'./images/door.gif',
+        WALL:'./images/wall.gif',
+        PLAYER:'./images/player.gif',
+        KEY:'./images/key.gif',
+        MOVE_INCREASE:'./images/moveIncrease.gif',
+        SPACE:'./images/empty.gif'
+        }
+
+    def __init__(self, master, size, width, **kwargs):
+        """
+        Construct a view of the advanced dungeon.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            size (int): The number of rows and columns in the grid
+            width (int): The number of pixels for the width
+                and height of the grid
+            **kwargs: Optional arguments, including view_size and margin
+        """
+        super().__init__(master, size, width, **kwargs)
+        self._cell_size = self._cell_width
+        self._images = {}
+        # position -> id of the image of the entity or player at that position
+        self._items = {}
+        # (top, left) of a block of the background -> (id, image)
+        self._tiles = {}
+
+    def clear(self):
+        """Removes every canvas item so that the next frame is drawn in full."""
+        super().clear()
+        self._items = {}
+        self._tiles = {}
+
+    def set_size(self, size):
+        """Shows a dungeon of another size, with images of the new cell size."""
+        super().set_size(size)
+        self._cell_size = self._cell_width
+        self._images = {}
+
+    def background_blocks(self, size, region=None):
+        """
+        Returns the blocks of cells drawn as separate background images.
+
+        Parameters:
+            size (int): the number of rows and columns in the dungeon
+            region (tuple<int, int, int, int>): When scrolling, the
+                (top, left, bottom, right) of the cells with canvas items
+
+        Returns:
+            (list<tuple<int, int, int, int>>): The top, left, rows and
+                columns of each block covering region, or the whole dungeon
+        """
+        if region is None:
+            return [(0, 0, size, size)]
+        tile = self.TILE_SIZE
+        top, left, bottom, right = region
+        return [(row, col, min(tile, size - row), min(tile, size - col))
+                for row in range(top - top % tile, bottom, tile)
+                for col in range(left - left % tile, right, tile)]
+
+    def prepare(self, game):
+        """
+        Decodes the images and composites the background blocks of the first
+        frame of game, which get_background then only has to display.
+
+        Parameters:
+            game (GameLogic): A game which will be shown next
+        """
+        for filename in self.IMAGE_FILES.values():
+            SPRITES.get_source(filename)
+        size = game.get_dungeon_size()
+        view_size, cell_size = self.layout(size)
+        region = None
+        if view_size is not None:
+            _, region = self.view_region(size, view_size, game.get_player().get_position())
+        game_information = game.get_game_information()
+        for top, left, rows, cols in self.background_blocks(size, region):
+            SPRITES.prepare_background(self.IMAGE_FILES[SPACE], self.IMAGE_FILES[WALL],
+                                       self.find_walls(game_information, top, left, rows, cols),
+                                       rows, cols, cell_size)
+
+    def load_images(self):
+        """Loads the images of each entity, keeping references for later use."""
+        size = (self._cell_size, self._cell_size)
+        for char, filename in self.IMAGE_FILES.items():
+            self._images[char] = SPRITES.get(filename, size)
+
+    def draw_background(self, game_information, region=None):
+        """
+        Draws the floor and walls as one image, or when scrolling as the
+        blocks of TILE_SIZE cells which cover region, deleting the blocks
+        which no longer do.
+
+        parameter:
+            game_information (dict<tuple<int, int>: Entity): Dictionary
+                containing the position and the corresponding Entity
+            region (tuple<int, int, int, int>): When scrolling, the
+                (top, left, bottom, right) of the cells with canvas items
+        """
+        if not self._images:
+            self.load_images()
+        wanted = set()
+        for top, left, rows, cols in self.background_blocks(self._size, region):
+            wanted.add((top, left))
+            if (top, left) in self._tiles:
+                continue
+            image = SPRITES.get_background(self.IMAGE_FILES[SPACE], self.IMAGE_FILES[WALL],
+                                           self.find_walls(game_information, top, left, rows, cols),
+                                           rows, cols, self._cell_size)
+            item = self.create_image((left*self._cell_width, top*self._cell_width),
+                                     image=image, anchor=tk.NW)
+            self.tag_lower(item)
+            self._tiles[(top, left)] = (item, image)
+        for block in set(self._tiles) - wanted:
+            self.delete(self._tiles.pop(block)[0])
+
+    @staticmethod
+    def find_walls(game_information, top, left, rows, cols):
+        """
+        Returns the walls in a block of cells.
+
+        Parameters:
+            game_information (dict<tuple<int, int>: Entity): Dictionary
+                containing the position and the corresponding Entity
+            top, left (int): The row and column of the top left cell
+            rows, cols (int): The number of rows and columns of the block
+
+        Returns:
+            (frozenset<tuple<int, int>>): The (row, col) of each wall,
+                counted from the top left cell
+        """
+        walls = []
+        for row in range(top, top + rows):
+            for col in range(left, left + cols):
+                entity = game_information.get((row, col))
+                if entity is not None and entity.get_id() == WALL:
+                    walls.append((row - top, col - left))
+        return frozenset(walls)
+
+    def draw_cell(self, position, char):
+        """
+        Draws the image of char on top of the background at position, or
+        deletes it if the cell is now empty.
+
+        parameter:
+            position (tuple<int, int>): The (row, col) position of the cell
+            char (str): The character of the entity to display
+        """
+        item = self._items.get(position)
+        image = self._images.get(char) if char != SPACE else None
+        if image is None:
+            if item is not None:
+                self.delete(self._items.pop(position))
+        elif item is None:
+            rows, cols = position
+            pixel_position = (cols*self._cell_width, rows*self._cell_width)
+            self._items[position] = self.create_image(pixel_position,
+                                                      image=image, anchor=tk.NW)
+        else:
+            self.itemconfig(item, image=image)
+
+    def erase_cell(self, position):
+        """Deletes the image of the cell at position."""
+        item = self._items.pop(position, None)
+        if item is not None:
+            self.delete(item)
+
+class KeyPad(AbstractGrid):
+    """Display of the keypad"""
+    def __init__(self, master, width, height, **kwargs):
+        """
+        Construct a view of the advanced dungeon.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            width (int): The number of pixels for the width of the keypad
+            height (int): The number of pixels for the height of the keypad
+            **kwargs: Optional arguments.
+        """
+        super().__init__(master, 2, 3, width, height, **kwargs)
+
+    def pixel_to_direction(self, pixel):
+        """
+        Converts the x, y pixel position to the direction of the arrow
+        depicted at that position.
+
+        Parameters:
+            pixel(tuple<int, int>): pixel position
+
+        Returns:
+            keypad_direction(str): Returns keypad direction
+        """
+        position = self.pixel_to_position(pixel)
+        keypad_direction = {(0,1):'W',(1,0):'A',(1,1):'S',(1,2):'D'}
+        if position in keypad_direction:
+            return keypad_direction[position]
+
+    def draw_pad(self):
+        """Displays the keypad."""
+        keypad_position={'N':(0,1),'W':(1,0),'S':(1,1),'E':(1,2)}
+        for direction, position in keypad_position.items():
+            self.create_rectangle(self.get_bbox(position),fill='Dark grey')
+            self.annotate_position(position, direction)
+
+class StatusBar(tk.Frame):
+    """Display of the status bar."""
+    def __init__(self, master, move_count, **kwargs):
+        """
+        Construct a view of the status bar.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            move_count (int): The moves remaining of the player
+            **kwargs: Optional arguments.
+        """
+        super().__init__(master, **kwargs)
+        self._master = master
+
+        # Buttons
+        self._frame1 = tk.Frame(self)
+        self._frame1.pack(side=tk.LEFT, padx=40)
+
+        self.new_game_button = tk.Button(self._frame1, text='New Game')
+        self.new_game_button.pack(side=tk.TOP, pady=5)
+
+        self.quit_game_button = tk.Button(self._frame1, text='Quit')
+        self.quit_game_button.pack(side=tk.TOP)
+
+        # Timer status
+        self._frame2 = tk.Frame(self)
+        self._frame2.pack(side=tk.LEFT)
+
+        clock_img = SPRITES.get("./images/clock.gif", (40,60))
+
+        clock_display = tk.Label(self._frame2, image=clock_img)
+        clock_display.image = clock_img
+        clock_display.pack(side=tk.LEFT)
+
+        timer_text = tk.Label(self._frame2,text='Time elapsed',font='None 10 bold')
+        timer_text.pack(side=tk.TOP,pady=5)
+
+        self._time_elapsed = tk.Label(self._frame2)
+        self._time_elapsed.pack(side=tk.TOP)
+
+        # MoveCount status
+        self._frame3 = tk.Frame(self)
+        self._frame3.pack(side=tk.LEFT,padx=60) ##
+
+        lightning_img = SPRITES.get("./images/lightning.gif", (40,60))
+
+        lightning_display = tk.Label(self._frame3, image=lightning_img)
+        lightning_display.image = lightning_img
+        lightning_display.pack(side=tk.LEFT)
+
+        moves_text = tk.Label(self._frame3,text='Moves left',font='None 10 bold')
+        moves_text.pack(side=tk.TOP,pady=5)
+
+        self._moves_left = tk.Label(self._frame3, text=f'{move_count} moves remaining')
+        self._moves_left.pack(side=tk.TOP)
+
+
+class AdvancedStatusBar(StatusBar):
+    """Display of the advanced status bar."""
+    def __init__(self, master, move_count, lives, **kwargs):
+        """
+        Construct a view of the advanced status bar.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            move_count (int): The moves remaining of the player
+            lives(int): initial number of lives
+            **kwargs: Optional arguments.
+        """
+        super().__init__(master, move_count,**kwargs)
+
+        # Lives status
+        self._frame4 = tk.Frame(self)
+        self._frame4.pack(side=tk.LEFT)
+
+        lives_img = SPRITES.get("./images/lives.gif", (50,50))
+
+        lives_display = tk.Label(self._frame4, image=lives_img)
+        lives_display.image = lives_img
+        lives_display.pack(side=tk.LEFT)
+
+        self._lives_text = tk.Label(self._frame4,text=f'Lives remaining: {lives}',font='None 10 bold')
+        self._lives_text.pack(side=tk.TOP,pady=5)
+
+        self.use_life_button = tk.Button(self._frame4, text="Use life")
+        self.use_life_button.pack(side=tk.TOP)
+
+class PerformanceHud:
+    """An overlay in the corner of a dungeon map showing the timings of a Profiler."""
+
+    TAG = "hud"
+
+    def __init__(self, canvas, profiler):
+        """
+        Parameters:
+            canvas (tk.Canvas): The dungeon map to draw on
+            profiler (Profiler): The profiler timing the frames and moves
+        """
+        self._canvas = canvas
+        self._profiler = profiler
+
+    def update(self):
+        """Draws the current timings over whatever part of the dungeon is in view."""
+        frame = self._profiler.get_histogram("frame")
+        move = self._profiler.get_histogram("move")
+        items = len(self._canvas.find_all()) - len(self._canvas.find_withtag(self.TAG))
+        text = (f"frame {frame.percentile(0.5) / 1e6:.2f} ms\n"
+                f"move p50 {move.percentile(0.5) / 1e6:.3f} ms"
+                f" p99 {move.percentile(0.99) / 1e6:.3f} ms\n"
+                f"{items} canvas items")
+        x, y = self._canvas.canvasx(4), self._canvas.canvasy(4)
+        if not self._canvas.find_withtag(self.TAG):
+            self._canvas.create_text(x, y, anchor=tk.NW, fill="red",
+                                     font="TkFixedFont", tags=self.TAG)
+        self._canvas.coords(self.TAG, x, y)
+        self._canvas.itemconfig(self.TAG, text=text)
+        self._canvas.tag_raise(self.TAG)
+
+    def hide(self):
+        """Removes the overlay."""
+        self._canvas.delete(self.TAG)
+
+class LevelPrefetcher:
+    """
+    Builds the next level to be played on a background thread: the level
+    is read and indexed into a GameLogic, and its images are prepared, so
+    that switching to it does not stall the window. Only the most recently
+    requested level is kept.
+    """
+    def __init__(self, prepare=None):
+        """
+        Constructor of LevelPrefetcher, which starts its thread.
+
+        Parameters:
+            prepare (callable): Called with each GameLogic built, on the
+                background thread, for example AbstractDungeonMap.prepare
+        """
+        self._prepare = prepare
+        self._wanted = None
+        self._building = None
+        # dungeon name -> GameLogic, or the error building it
+        self._ready = {}
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Builds each requested level until closed."""
+        while True:
+            with self._condition:
+                while self._wanted is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                name, self._wanted = self._wanted, None
+                self._building = name
+            result = None
+            try:
+                result = GameLogic(name)
+                if self._prepare is not None:
+                    self._prepare(result)
+            except Exception as error:
+                # get raises it, as building the level there would have
+                result = error
+            finally:
+                with self._condition:
+                    # only the newest level is kept, the one before is released
+                    discarded = list(self._ready.values())
+                    self._ready = {name: result} if result is not None else {}
+                    if self._closed:
+                        discarded.extend(self._ready.values())
+                        self._ready = {}
+                    self._building = None
+                    self._condition.notify_all()
+                self._release(discarded)
+
+    @staticmethod
+    def _release(results):
+        """Closes the levels among results which will never be played."""
+        for result in results:
+            if isinstance(result, GameLogic):
+                result.close()
+
+    def request(self, dungeon_name):
+        """
+        Asks for a level to be built in the background.
+
+        Parameters:
+            dungeon_name (str): The name of the file to load the level from
+        """
+        with self._condition:
+            if dungeon_name in self._ready or dungeon_name == self._building:
+                return
+            self._wanted = dungeon_name
+            self._condition.notify_all()
+
+    def get(self, dungeon_name):
+        """
+        Returns a level which has not been played, waiting for it if it is
+        still being built, and building it here if it was never requested.
+
+        Parameters:
+            dungeon_name (str): The name of the file to load the level from
+
+        Returns:
+            (GameLogic): The level
+
+        Raises:
+            Exception: Whatever building the level raised, if it cannot be loaded
+        """
+        with self._condition:
+            while not self._closed and dungeon_name in (self._building, self._wanted):
+                self._condition.wait()
+            result = self._ready.pop(dungeon_name, None)
+        if result is None:
+            return GameLogic(dungeon_name)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self, timeout=PREFETCH_CLOSE_TIMEOUT):
+        """
+        Stops the thread and releases the levels not played. A level still
+        being built is released by the thread once it is done; it is waited
+        for at most timeout seconds, as the thread is a daemon which does
+        not need to finish before the game exits.
+
+        Parameters:
+            timeout (float): The seconds to wait for the thread
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            discarded, self._ready = list(self._ready.values()), {}
+        self._release(discarded)
+        self._thread.join(timeout)
+
+class GameApp:
+    """Communicator between the GameLogic and the View classes."""
+    def __init__(self,master,task=TASK_ONE,dungeon_name="game2.txt",
+                 autosave_interval=AUTOSAVE_INTERVAL, frame_rate=FRAME_RATE,
+                 profile=False, campaign=None):
+        """
+        Constructor of the GameApp class.
+
+        Parameters:
+            master (tk.TK()): An instance of tkinter.TK
+            task (constant): Constant used to decide the features of the game
+            dungeon_name(str): The name of the file to load the level from
+            autosave_interval (int): Milliseconds between saves to
+                AUTOSAVE_FILE when the game has a File menu, or None to
+                never save automatically
+            frame_rate (int): The most times the dungeon is redrawn per second
+            profile (bool): If True, the game starts with its profiling and
+                performance HUD on, which F3 turns on and off at any time
+            campaign (list<str>): The levels to play one after the other,
+                such as CAMPAIGN, starting from the first instead of
+                dungeon_name; each is loaded in the background while the
+                one before it is played
+        """
+        self._campaign = campaign
+        self._level_number = 0
+        if campaign is not None:
+            dungeon_name = campaign[0]
+        self._dungeon_name = dungeon_name
+        # the level as it starts, which each new game is forked from
+        self._level = GameLogic(dungeon_name)
+        self._game = self._level.fork()
+        self._engine = GameEngine(self._game)
+        self._game.start_journal()
+        self._size = self._game.get_dungeon_size()
+        self._master = master
+        self._master.title("Key Cave Adventure Game")
+        self._master.geometry("850x720")
+        # closing the window quits, so the saves and scores still queued are written
+        self._master.protocol("WM_DELETE_WINDOW", self.quit)
+        self._label = tk.Label(self._master, text="Key Cave Adventure Game",
+                               bg='Medium spring green', font='None 16 bold')
+        self._label.pack(side=tk.TOP,fill=tk.BOTH,ipady=10)
+        self._moves = self._game.get_player().moves_remaining()
+        self._task = task
+        self._time_count = 0
+        self._lives = 3
+        self._replaying = False
+        # the after id of the next event of the replay being watched
+        self._replay_after = None
+        self._autosaver = None
+        self._unsaved = False
+        self._autosave_warned = False
+        self._leaderboard = None
+        self.start_recording()
+
+        # display dungeon based on task
+        if self._task == TASK_ONE:
+            self._display = DungeonMap(self._master, self._size,
+                                       width=600, view_size=VIEW_SIZE,
+                                       bg='light gray')
+        else:
+            self._display = AdvancedDungeonMap(self._master, self._size,
+                                               width=600, view_size=VIEW_SIZE,
+                                               bg='light gray')
+            menubar = tk.Menu(self._master)
+            self._master.config(menu=menubar)
+            filemenu = tk.Menu(menubar)
+            menubar.add_cascade(label="File", menu=filemenu)
+            filemenu.add_command(label="Save game",command=self.save_file)
+            filemenu.add_command(label="Load game",command=self.open_file)
+            filemenu.add_command(label="New game", command=self.restart)
+            filemenu.add_command(label="Save replay", command=self.save_replay)
+            filemenu.add_command(label="Watch replay", command=self.open_replay)
+            filemenu.add_command(label="Export profile", command=self.export_profile)
+            filemenu.add_command(label="Quit", command=self.quit)
+            if autosave_interval is not None:
+                self._autosaver = savegame.Autosaver(AUTOSAVE_FILE)
+                self._master.after(autosave_interval, self.autosave, autosave_interval)
+        if self._task == MASTERS:
+            filemenu.add_command(label="High scores",command=self.high_scores_popup)
+            self._leaderboard = AsyncLeaderboard()
+            self.poll_leaderboard()
+
+        self._display.pack(side=tk.TOP,anchor=tk.NW)
+        self._display.bind_all("<Key>", self.key_press)
+        self._display.bind_all("<F3>", lambda e: self.toggle_profiling())
+        self._keypad = KeyPad(self._master, width=200, height=100)
+        self._keypad.place(x=610,y=350)
+        self._keypad.bind("<Button-1>", self.pad_press)
+
+        # display status bar based on task
+        if self._task == TASK_TWO:
+            self._status_bar = StatusBar(self._master, self._moves)
+
+        elif self._task == MASTERS:
+            self._status_bar = AdvancedStatusBar(self._master, self._moves, self._lives)
+            self._status_bar._lives_text.config(text=f'Lives remaining: {self._lives}')
+            self._status_bar.use_life_button.config(command=self.use_life)
+
+        if self._task == TASK_TWO or self._task == MASTERS:
+            self._status_bar.pack(side=tk.TOP,anchor=tk.W)
+            self._status_bar.new_game_button.config(command=self.restart)
+            self._status_bar.quit_game_button.config(command=self.quit)
+            self._status_bar._moves_left.config(text=f'{self._moves} moves remaining')
+            self.timer()
+
+        # moves are applied as soon as they arrive, but drawn once per frame
+        self._action = None
+        self._actions = deque()
+        self._frame_interval = 1 / frame_rate
+        self._last_frame = 0
+        self._frame = None
+        self._profiler = Profiler()
+        self._hud = PerformanceHud(self._display, self._profiler)
+        self._keypad.draw_pad()
+        self.draw()
+
+        self._prefetcher = None
+        if campaign is not None:
+            self._prefetcher = LevelPrefetcher(self._display.prepare)
+            self.show_level_number()
+            self.prefetch_next_level()
+        if profile:
+            self.toggle_profiling()
+
+    def timer(self):
+        """
+        Displaying the number of minutes and seconds the user
+        has been playing the current game
+        """
+        second = self._time_count % 60
+        minute = self._time_count // 60
+        self._status_bar._time_elapsed.config(text=f'{minute}m {second}s')
+        self._time_count += 1
+        self._master.after(1000, self.timer)
+
+    def use_life(self):
+        """Undo the most recent move"""
+        if self._lives > 0 and self._game.can_undo():
+            if self._recorder is not None:
+                self._recorder.use_life(self._time_count)
+            move = self._game.undo()
+            self._unsaved = True
+            self._lives -= 1
+            self._time_count = move.get_time()
+
+            self._status_bar._lives_text.config(text=f'Lives remaining: {self._lives}')
+            self._status_bar._moves_left.config(text=f'{self._game.get_player().moves_remaining()} moves remaining')
+            self._display.refresh()
+            self.draw()
+
+    def queue_action(self, action):
+        """Adds an action of the player to the queue and applies every queued one."""
+        self._actions.append(action)
+        while self._actions:
+            self._action = self._actions.popleft()
+            self.play()
+
+    def play(self):
+        """Handles the player interaction."""
+        direction = self._action
+        if direction in DIRECTIONS:
+            self.apply_move(direction)
+
+            if not (self._game.won() or self._game.check_game_over()):
+                self.request_frame()
+                return
+
+            # the game has ended, so show its last move before anything else
+            self._actions.clear()
+            self.render()
+            if self._replaying:
+                return
+
+            if self._game.won():
+                self.endgame_won()
+
+            if self._game.check_game_over():
+                self.endgame_lost()
+
+    def apply_move(self, direction):
+        """
+        Records and makes a move, which is what the "move" histogram times.
+
+        Parameters:
+            direction (str): One of DIRECTIONS
+        """
+        if self._recorder is not None:
+            self._recorder.record(direction, self._time_count)
+        # the journal of the game records the move so that it can be undone
+        self._engine.step(direction, self._time_count)
+        self._unsaved = True
+
+    def request_frame(self):
+        """
+        Schedules the dungeon to be drawn, unless it already is. Frames are
+        drawn when Tk is idle, but no more often than the frame rate, so
+        many moves in a row are drawn at once.
+        """
+        if self._frame is not None:
+            return
+        delay = self._last_frame + self._frame_interval - time.perf_counter()
+        if delay <= 0:
+            self._frame = self._master.after_idle(self.render)
+        else:
+            self._frame = self._master.after(int(delay * 1000) + 1, self.render)
+
+    def render(self):
+        """Draws a frame: the dungeon and the moves remaining."""
+        if self._frame is not None:
+            self._master.after_cancel(self._frame)
+            self._frame = None
+        self._last_frame = time.perf_counter()
+        if self._task == TASK_TWO or self._task == MASTERS:
+            moves = self._game.get_player().moves_remaining()
+            self._status_bar._moves_left.config(text=f'{moves} moves remaining')
+        self.draw()
+
+    def draw(self):
+        """Displays the changes to the dungeon since the last frame."""
+        game_information = self._game.get_game_information()
+        player = self._game.get_player()
+        player_pos = player.get_position()
+        self._display.draw_grid(game_information, player_pos)
+
+    def endgame_won(self):
+        """Handle the end of game if player won."""
+        if self._task == TASK_ONE:
+            self._master.update_idletasks()
+            tk.messagebox.showinfo("You won!", "You have finished the level!")
+
+        elif self._task == TASK_TWO and self.has_next_level():
+            self._master.update_idletasks()
+            tk.messagebox.showinfo("You won!",
+            f"You have finished the level with a score of {self._time_count}.\n\nOn to the next level!")
+
+        elif self._task == TASK_TWO:
+            self._master.update_idletasks()
+            if tk.messagebox.askyesno("You won!",
+            f"You have finished the level with a score of {self._time_count}.\n\nWould you like to play again?"):
+                self.restart()
+
+        elif self._task == MASTERS:
+            score = self._time_count
+            minute = score // 60
+            second = score % 60
+            player_name = tk.simpledialog.askstring("You won!",
+            f"You won in {minute}m and {second}s! Enter your name:")
+            if player_name is not None:
+                self._leaderboard.request("add", self._dungeon_name, player_name, score)
+
+        if self.has_next_level():
+            self.next_level()
+        elif self._campaign is not None:
+            self._master.update_idletasks()
+            if tk.messagebox.askyesno("Campaign complete!",
+            f"You have finished all {len(self._campaign)} levels of the campaign.\n\nWould you like to play it again?"):
+                self.go_to_level(0)
+
+    def endgame_lost(self):
+        """Handle the end of game if player lost."""
+        if self._task == TASK_ONE:
+            tk.messagebox.showinfo("You lost!", "You have lost the game!")
+
+        else:
+            if tk.messagebox.askyesno("You lost", "Would you like to play again?"):
+                self.restart()
+
+    def key_press(self, e):
+        """Reaction when the keyboard key is pressed."""
+        if self._replaying:
+            return
+        self.queue_action(e.char)
+
+    def pad_press(self, e):
+        """Reaction when the keypad key is pressed."""
+        if self._replaying:
+            return
+        self.queue_action(self._keypad.pixel_to_direction((e.x, e.y)))
+
+    def restart(self):
+        """Reset the game to the initial."""
+        self.start_level(self.get_level())
+
+    def get_level(self):
+        """Returns the current level as it starts, which must not be changed."""
+        if self._level is None or self._level.get_dungeon_name() != self._dungeon_name:
+            if self._level is not None:
+                self._level.close()
+            self._level = GameLogic(self._dungeon_name)
+        return self._level
+
+    def start_level(self, level):
+        """
+        Starts a new game of a level, which may be of another size.
+
+        Parameters:
+            level (GameLogic): The level as it starts, which is not changed
+        """
+        self.stop_replay()
+        if self._level is not None and self._level is not level:
+            # the games forked from the old level are not played any more
+            self._level.close()
+        self._level = level
+        self._dungeon_name = level.get_dungeon_name()
+        # the recording starts with the state of the new game, lives included
+        self._time_count = 0
+        if self._task == MASTERS:
+            self._lives = 3
+        size = level.get_dungeon_size()
+        if size != self._size:
+            self._size = size
+            self._display.set_size(size)
+        else:
+            self._display.clear()
+        self._game = level.fork()
+        self._engine = GameEngine(self._game)
+        self._game.start_journal()
+        self.start_recording()
+        if self._task == TASK_TWO or self._task == MASTERS:
+            self._status_bar._moves_left.config(text=f'{self._game.get_player().moves_remaining()} moves remaining')
+        if self._task == MASTERS:
+            self._status_bar._lives_text.config(text=f'Lives remaining: {self._lives}')
+        self.draw()
+
+    def has_next_level(self):
+        """Returns True if a campaign is being played and its last level is not."""
+        return self._campaign is not None and self._level_number + 1 < len(self._campaign)
+
+    def prefetch_next_level(self):
+        """Starts loading the next level of the campaign in the background."""
+        if self.has_next_level():
+            self._prefetcher.request(self._campaign[self._level_number + 1])
+
+    def next_level(self):
+        """Moves on to the next level of the campaign, loaded while this one was played."""
+        self.go_to_level(self._level_number + 1)
+
+    def go_to_level(self, level_number):
+        """
+        Starts a level of the campaign, taking it from the prefetcher.
+
+        Parameters:
+            level_number (int): The index of the level in the campaign
+        """
+        name = self._campaign[level_number]
+        try:
+            level = self._prefetcher.get(name)
+        except Exception:
+            tk.messagebox.showwarning("Warning!", f"The level {name} cannot be loaded")
+            return
+        self._level_number = level_number
+        self.start_level(level)
+        self.show_level_number()
+        self.prefetch_next_level()
+
+    def show_level_number(self):
+        """Shows which level of the campaign is being played."""
+        self._label.config(text=f"Key Cave Adventure Game - Level {self._level_number + 1}"
+                                f" of {len(self._campaign)}")
+
+    def quit(self):
+        """
+        Destroys the window once the autosave and the scores still waiting
+        on background threads are written.
+        """
+        if tk.messagebox.askyesno("Quit?","Are you sure you would like to quit?"):
+            if self._autosaver is not None:
+                self.autosave(None)
+                self._autosaver.close()
+            if self._prefetcher is not None:
+                self._prefetcher.close()
+            if self._leaderboard is not None:
+                # scores still queued are written before the game exits
+                self._leaderboard.close()
+            self._level.close()
+            self._master.destroy()
+
+    def save_document(self):
+        """Returns a saved game document of the whole state of the game."""
+        return savegame.to_document(self._game, **self.get_saved_info())
+
+    def get_saved_info(self):
+        """Returns the state of the GameApp which is saved with the game."""
+        return {"task": self._task, "time": self._time_count, "lives": self._lives,
+                "level_number": self._level_number}
+
+    def save_file(self):
+        """Saves the whole state of the game into a file."""
+        filename = filedialog.asksaveasfilename(defaultextension=savegame.EXTENSION)
+        if filename:
+            try:
+                savegame.write_document(filename, self.save_document())
+            except (OSError, ValueError) as error:
+                tk.messagebox.showwarning("Warning!", f"The game could not be saved: {error}")
+
+    def autosave(self, interval):
+        """
+        Hands a snapshot of the game to the autosaver if it changed since the
+        last time, and schedules the next autosave after interval milliseconds.
+        The snapshot is described and encoded on the thread of the autosaver.
+        A game which cannot be saved, such as one of a binary or chunked
+        level, is warned about once and then skipped.
+        """
+        if interval is not None:
+            self._master.after(interval, self.autosave, interval)
+        if self._unsaved:
+            self._unsaved = False
+            try:
+                game = self._game.snapshot()
+            except ValueError as error:
+                if not self._autosave_warned:
+                    self._autosave_warned = True
+                    tk.messagebox.showwarning("Warning!", f"The game cannot be autosaved: {error}")
+                return
+            self._autosaver.submit(game, **self.get_saved_info())
+
+    def open_file(self):
+        """Load saved game."""
+        filename = filedialog.askopenfilename()
+        if not filename:
+            return
+        try:
+            game, saved_info = savegame.load(filename)
+        except (OSError, ValueError) as error:
+            tk.messagebox.showwarning("Warning!", f"This is not a valid file: {error}")
+            return
+        self.stop_replay()
+
+        # the background of the map is of the old level, so it is drawn again
+        size = game.get_dungeon_size()
+        if size != self._size:
+            self._size = size
+            self._display.set_size(size)
+        else:
+            self._display.clear()
+        self._dungeon_name = game.get_dungeon_name()
+        self._engine = GameEngine(game)
+        self._game = game
+        if game.get_journal() is None:
+            game.start_journal()
+        # a loaded game does not start from the level, so it cannot be replayed
+        self._recorder = None
+        # older saved games may lack any of these, which then stay as they are
+        self._task = saved_info.get("task", self._task)
+        self._time_count = saved_info.get("time", self._time_count)
+        self._status_bar._moves_left.config(text=f'{game.get_player().moves_remaining()} moves remaining')
+        if self._task == MASTERS:
+            self._lives = saved_info.get("lives", self._lives)
+            self._status_bar._lives_text.config(text=f'Lives remaining: {self._lives}')
+        if self._campaign is not None:
+            self._level_number = self.find_level_number(saved_info.get("level_number"))
+            self.show_level_number()
+            self.prefetch_next_level()
+        self.draw()
+
+    def find_level_number(self, level_number):
+        """
+        Returns the index in the campaign of the level being played: the
+        one saved with the game if it is of this level, otherwise the first
+        one of this level, or the current one if the campaign has no such
+        level.
+
+        Parameters:
+            level_number (int): The index saved with the game, or None
+        """
+        campaign = self._campaign
+        if (isinstance(level_number, int) and 0 <= level_number < len(campaign)
+                and campaign[level_number] == self._dungeon_name):
+            return level_number
+        if self._dungeon_name in campaign:
+            return campaign.index(self._dungeon_name)
+        return self._level_number
+
+    def start_recording(self):
+        """Starts recording the input of a new game in memory."""
+        lives = self._lives if self._task == MASTERS else 0
+        self._recording = io.BytesIO()
+        self._recorder = InputRecorder(self._recording, self._dungeon_name,
+                                       self._game.get_player().moves_remaining(),
+                                       lives)
+
+    def save_replay(self):
+        """Saves the input recorded since the game started."""
+        if self._recorder is None:
+            tk.messagebox.showwarning("Warning!", "A loaded game cannot be replayed")
+            return
+        filename = filedialog.asksaveasfilename(defaultextension=EXTENSION)
+        if filename:
+            self._recorder.close()
+            with open(filename, "wb") as fd:
+                fd.write(self._recording.getvalue())
+
+    def open_replay(self):
+        """Asks for a recorded game and the speed to watch it at."""
+        filename = filedialog.askopenfilename(filetypes=[("Replays", f"*{EXTENSION}")])
+        if not filename:
+            return
+        speed = tk.simpledialog.askfloat("Watch replay", "Speed (1 is real time):",
+                                         initialvalue=1.0, minvalue=0.1)
+        if speed is not None:
+            self.watch_replay(filename, speed)
+
+    def watch_replay(self, filename, speed=1.0):
+        """
+        Replays a recorded game in the window, ignoring the input of the
+        player until it ends.
+
+        Parameters:
+            filename (str): The input log, recorded on the current level
+            speed (float): How many times faster than real time to play it
+        """
+        self.stop_replay()
+        try:
+            with open(filename, "rb") as fd:
+                _, moves, recorded_level = read_header(fd)
+                events = list(read_events(fd))
+            current_level = level_hash(self._dungeon_name)
+        except (OSError, ValueError):
+            tk.messagebox.showwarning("Warning!", "This is not a valid replay")
+            return
+        if recorded_level != current_level or moves != self.get_level().get_player().moves_remaining():
+            tk.messagebox.showwarning("Warning!", "This replay was recorded on another level")
+            return
+        self.restart()
+        self._recorder = None
+        self._replaying = True
+        self.replay_event(iter(events), speed, 0)
+
+    def replay_event(self, events, speed, last_time):
+        """Applies the next event of a replay and schedules the one after it."""
+        self._replay_after = None
+        event = next(events, None)
+        if event is None or self._game.won():
+            self._replaying = False
+            tk.messagebox.showinfo("Replay", "The replay has ended.")
+            # a new game, so that it is recorded from its start again
+            self.restart()
+            return
+        time, action = event
+        self._time_count = time
+        if action == USE_LIFE:
+            self.use_life()
+        else:
+            self.queue_action(action)
+        delay = max(REPLAY_INTERVAL, (time - last_time) * 1000)
+        self._replay_after = self._master.after(int(delay / speed), self.replay_event,
+                                                events, speed, time)
+
+    def stop_replay(self):
+        """Stops the replay being watched, if any, before its next event."""
+        if self._replay_after is not None:
+            self._master.after_cancel(self._replay_after)
+            self._replay_after = None
+        self._replaying = False
+
+    def poll_leaderboard(self):
+        """Hands the results of finished leaderboard queries to their callbacks."""
+        self._leaderboard.poll()
+        self._master.after(LEADERBOARD_POLL, self.poll_leaderboard)
+
+    def toggle_profiling(self):
+        """
+        Turns the timing of the game and the performance HUD on or off.
+        When off, the timed methods are the original ones, so they cost
+        nothing extra.
+        """
+        if self._profiler.is_instrumenting():
+            self._profiler.uninstrument()
+            self._master.after_cancel(self._hud_update)
+            self._hud.hide()
+            return
+        profiler = self._profiler
+        # only keys which are directions make a move, so only those are timed
+        profiler.instrument(GameApp, "apply_move", "move")
+        profiler.instrument(GameApp, "render", "frame")
+        profiler.instrument(GameLogic, "collision_check")
+        for entity_type in (Key, MoveIncrease, Door):
+            profiler.instrument(entity_type, "on_hit")
+        profiler.instrument(AbstractDungeonMap, "draw_grid")
+        profiler.instrument(SpriteCache, "get_source", "load_image")
+        profiler.instrument(SpriteCache, "get", "get_sprite")
+        self.update_hud()
+
+    def update_hud(self):
+        """Updates the performance HUD every HUD_INTERVAL milliseconds while profiling."""
+        self._hud.update()
+        self._hud_update = self._master.after(HUD_INTERVAL, self.update_hud)
+
+    def export_profile(self):
+        """Saves the timings collected so far, as JSON or as a cProfile dump for .prof files."""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("cProfile dump", "*.prof")])
+        if filename:
+            self._profiler.export(filename)
+
+    def high_scores_popup(self):
+        """Displays the leaderboard of the current level"""
+        popup = tk.Toplevel(self._master)
+        popup.title("Top 3")
+        label = tk.Label(popup, text="High Scores",bg='Medium spring green', font='None 16 bold' )
+        label.pack(side=tk.TOP,fill=tk.BOTH, ipady=5)
+        places = tk.Label(popup, text="Loading...")
+        places.pack()
+        done_button = tk.Button(popup, text='Done', command=popup.destroy)
+        done_button.pack()
+
+        def show(top3):
+            if not places.winfo_exists():
+                return
+            if isinstance(top3, Exception):
+                places.config(text="The high scores cannot be read")
+            else:
+                places.config(text="\n".join(f"{name}: {score}s" for name, score in top3))
+
+        self._leaderboard.request("top", self._dungeon_name, 3, callback=show)